@@ -0,0 +1,4 @@
+"""
+to run benchmarks
+ 1. python -m benchmarks.<module> from the repository root
+"""
@@ -0,0 +1,56 @@
+"""Compares Interpreter.evaluate_batch against one Interpreter per target profile
+when scoring actions against a population of monster stat blocks.
+
+    python -m benchmarks.bench_batch
+"""
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dndast.nodes import dict_to_node
+from dndast.interpreter import Interpreter
+from .corpus import TARGETS, corpus
+
+def profiles(n, seed=0):
+    """Returns n targets dicts with armor classes and save bonuses typical of monsters.
+    """
+    rng = random.Random(seed)
+    result = []
+    for _ in range(n):
+        target = {
+            'armor_class': rng.randint(11, 19),
+            'strength_save_bonus': rng.randint(-1, 6),
+            'dexterity_save_bonus': rng.randint(-1, 5),
+            'constitution_save_bonus': rng.randint(0, 7),
+            'wisdom_save_bonus': rng.randint(-1, 4),
+        }
+        result.append({**TARGETS, 'melee_target': target, 'ranged_target': target})
+    return result
+
+def run(n=500, trees=('multiattack', 'fireball', 'nested_selection'), workers=4):
+    population = profiles(n)
+    rows = []
+    for name in trees:
+        tree = dict_to_node(corpus()[name])
+        groups = len(Interpreter().group_profiles(tree, population))
+
+        start = time.perf_counter()
+        expected = [Interpreter(p).evaluate(tree) for p in population]
+        naive = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = Interpreter().evaluate_batch(tree, population)
+        batch = time.perf_counter() - start
+        assert all(a.equals(b) for a, b in zip(results, expected))
+
+        with ProcessPoolExecutor(workers) as executor:
+            start = time.perf_counter()
+            results = Interpreter().evaluate_batch(tree, population, executor=executor)
+            pool = time.perf_counter() - start
+        assert all(a.equals(b) for a, b in zip(results, expected))
+        rows.append((name, n, groups, naive, batch, pool))
+    return rows
+
+if __name__ == '__main__':
+    print(f'{"tree":>18} {"profiles":>9} {"groups":>7} {"naive (s)":>10} {"batch (s)":>10} {"pool (s)":>9}')
+    for name, n, groups, naive, batch, pool in run():
+        print(f'{name:>18} {n:>9} {groups:>7} {naive:>10.2f} {batch:>10.2f} {pool:>9.2f}')
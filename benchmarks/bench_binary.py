@@ -0,0 +1,40 @@
+"""Compares the binary tree format against JSON lines for a corpus of trees,
+in size and in the time to encode nodes and decode them back into nodes.
+
+    python -m benchmarks.bench_binary
+"""
+import json
+import time
+from dndast.nodes import dict_to_node
+from dndast.binary import dumps_all, loads_all
+from .corpus import CORPUS
+
+def timed(f, *args):
+    start = time.perf_counter()
+    result = f(*args)
+    return time.perf_counter() - start, result
+
+def to_json(trees):
+    return '\n'.join(json.dumps(tree.to_dict()) for tree in trees).encode()
+
+def from_json(data):
+    return [dict_to_node(json.loads(line)) for line in data.splitlines()]
+
+def run(n=100_000):
+    sources = list(CORPUS.values())
+    trees = [dict_to_node(sources[i % len(sources)]) for i in range(n)]
+    json_encode, json_data = timed(to_json, trees)
+    json_decode, json_trees = timed(from_json, json_data)
+    binary_encode, binary_data = timed(dumps_all, trees)
+    binary_decode, binary_trees = timed(loads_all, binary_data)
+    assert json_trees == trees and binary_trees == trees
+    return [
+        ('json lines', len(json_data), json_encode, json_decode),
+        ('binary', len(binary_data), binary_encode, binary_decode),
+    ]
+
+if __name__ == '__main__':
+    rows = run()
+    print(f'{"format":>12} {"MiB":>8} {"encode (s)":>11} {"decode (s)":>11}')
+    for name, size, encode, decode in rows:
+        print(f'{name:>12} {size/2**20:>8.2f} {encode:>11.2f} {decode:>11.2f}')
@@ -0,0 +1,51 @@
+"""Times evaluating the corpus in a fresh process without a result cache, with an
+empty cache and with a cache filled by an earlier run.
+
+    python -m benchmarks.bench_cache
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from dndast.nodes import dict_to_node
+from dndast.interpreter import Interpreter
+from dndast.cache import ResultCache
+from .corpus import TARGETS, corpus
+
+def run(path=None):
+    """Evaluates every corpus tree once, returning the seconds taken.
+    """
+    nodes = [dict_to_node(tree) for tree in corpus().values()]
+    interpreter = Interpreter(TARGETS)
+    cache = ResultCache(path) if path else None
+    start = time.perf_counter()
+    for node in nodes:
+        if cache is not None:
+            cache.evaluate(interpreter, node)
+        else:
+            interpreter.evaluate(node)
+    seconds = time.perf_counter() - start
+    if cache is not None:
+        cache.close()
+    return seconds
+
+def run_process(path=None):
+    """Runs run(path) in a new interpreter process, so that no in-memory caches are warm.
+    """
+    args = [sys.executable, '-m', 'benchmarks.bench_cache', '--run'] + ([path] if path else [])
+    return float(subprocess.run(args, capture_output=True, text=True, check=True).stdout)
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'results.db')
+        print(f'{"no cache":>12} {run_process():>8.3f} s')
+        print(f'{"cold cache":>12} {run_process(path):>8.3f} s')
+        print(f'{"warm cache":>12} {run_process(path):>8.3f} s')
+        print(f'{"size":>12} {os.path.getsize(path)/2**10:>8.0f} KiB')
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--run']:
+        print(run(*sys.argv[2:]))
+    else:
+        main()
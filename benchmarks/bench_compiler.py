@@ -0,0 +1,34 @@
+"""Compares the compiled dice program against the tree-walking Interpreter.
+
+    python -m benchmarks.bench_compiler
+"""
+import timeit
+from dndast.dice_roller.lexer import Lexer
+from dndast.dice_roller.parser_ import Parser
+from dndast.dice_roller.interpreter import Interpreter
+from dndast.dice_roller.compiler import Compiler
+
+def nested_expression(depth):
+    """Builds an expression nested depth levels deep, e.g. ((((1+1d2)*1)-1)+1d2)...
+    """
+    ops = ['+ 1d2', '* 1', '- 1', '+ 2']
+    expr = '1'
+    for i in range(depth):
+        expr = f'({expr} {ops[i % len(ops)]})'
+    return expr
+
+def run(depths=(8, 32, 128), number=200):
+    interpreter = Interpreter()
+    rows = []
+    for depth in depths:
+        tree = Parser(Lexer(nested_expression(depth)).generate_tokens()).parse()
+        program = Compiler().compile(tree)
+        walk = timeit.timeit(lambda: interpreter.evaluate(tree), number=number)/number
+        compiled = timeit.timeit(program, number=number)/number
+        rows.append((depth, walk, compiled))
+    return rows
+
+if __name__ == '__main__':
+    print(f'{"depth":>6} {"tree-walk (us)":>15} {"compiled (us)":>15} {"speedup":>8}')
+    for depth, walk, compiled in run():
+        print(f'{depth:>6} {1e6*walk:>15.1f} {1e6*compiled:>15.1f} {walk/compiled:>8.2f}')
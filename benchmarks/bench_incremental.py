@@ -0,0 +1,55 @@
+"""Compares re-evaluating every tree in benchmarks.corpus from scratch against
+Interpreter.update_targets after changing a single target stat.
+
+    python -m benchmarks.bench_incremental
+"""
+import time
+from dndast.nodes import dict_to_node
+from dndast.interpreter import Interpreter
+from .corpus import TARGETS, corpus
+
+CHANGES = [
+    {'melee_target.armor_class': 17},
+    {'ranged_target.armor_class': 15},
+    {'ranged_target.dexterity_save_bonus': 4},
+    {'melee_target.wisdom_save_bonus': 3},
+]
+
+def shifted(tree, k):
+    """Adds k to every attack bonus and save DC, so that copies are distinct trees.
+    """
+    if type(tree) is dict:
+        return {key: v + k if key in ('attack_bonus', 'save_dc') and type(v) is int else shifted(v, k) for key, v in tree.items()}
+    if type(tree) is list:
+        return [shifted(v, k) for v in tree]
+    return tree
+
+def run(copies=4):
+    trees = [dict_to_node(shifted(tree, k)) for k in range(copies) for tree in corpus().values()]
+    incremental = Interpreter(TARGETS, memo=True, memo_size=None)
+    for tree in trees:
+        incremental.evaluate(tree)
+
+    rows = []
+    targets = TARGETS
+    for change in CHANGES:
+        start = time.perf_counter()
+        targets = incremental.update_targets(change)
+        misses = incremental.memo_info()['misses']
+        for tree in trees:
+            incremental.evaluate(tree)
+        partial = time.perf_counter() - start
+        recomputed = incremental.memo_info()['misses'] - misses
+
+        start = time.perf_counter()
+        full = Interpreter(targets)
+        for tree in trees:
+            full.evaluate(tree)
+        rows.append((change, len(trees), recomputed, time.perf_counter() - start, partial))
+    return rows
+
+if __name__ == '__main__':
+    print(f'{"change":>38} {"trees":>6} {"recomputed":>11} {"full (ms)":>10} {"incremental (ms)":>17}')
+    for change, trees, recomputed, full, partial in run():
+        change = ', '.join(f'{k}={v}' for k, v in change.items())
+        print(f'{change:>38} {trees:>6} {recomputed:>11} {1e3*full:>10.1f} {1e3*partial:>17.1f}')
@@ -0,0 +1,41 @@
+"""Shows how the cost of keep-highest pools scales with the number of dice rolled.
+
+Compares icepool's order-statistic evaluation, used by DieNode, against
+enumerating every combination of rolls (only run for small pools).
+
+    python -m benchmarks.bench_keep
+"""
+import itertools
+import time
+from collections import Counter
+from icepool import Die
+from dndast.dice_roller.backends import icepool_die
+
+def brute_force(count, sides, keep):
+    outcomes = Counter()
+    for rolls in itertools.product(range(1, sides + 1), repeat=count):
+        outcomes[sum(sorted(rolls)[-keep:])] += 1
+    return Die(outcomes)
+
+def timed(f, *args):
+    start = time.perf_counter()
+    result = f(*args)
+    return time.perf_counter() - start, result
+
+def run(sides=6, keep=3, counts=(3, 4, 5, 6, 8, 12, 20, 40, 80), max_brute_force=6):
+    rows = []
+    for count in counts:
+        icepool_die.cache_clear()
+        order_statistic, die = timed(icepool_die, count, sides, None, keep)
+        enumerated = None
+        if count <= max_brute_force:
+            enumerated, expected = timed(brute_force, count, sides, keep)
+            assert die.equals(expected, simplify=True)
+        rows.append((f'{count}d{sides}kh{keep}', order_statistic, enumerated))
+    return rows
+
+if __name__ == '__main__':
+    print(f'{"pool":>10} {"order statistic (ms)":>21} {"enumeration (ms)":>17}')
+    for pool, order_statistic, enumerated in run():
+        enumerated = f'{1e3*enumerated:>17.1f}' if enumerated is not None else f'{"-":>17}'
+        print(f'{pool:>10} {1e3*order_statistic:>21.2f} {enumerated}')
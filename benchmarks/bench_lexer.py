@@ -0,0 +1,43 @@
+"""Compares tokenize() against Lexer.generate_tokens() on stat-block damage strings.
+
+    python -m benchmarks.bench_lexer
+"""
+import timeit
+from dndast.dice_roller.lexer import Lexer, tokenize
+from dndast.dice_roller.parser_ import Parser
+
+DAMAGE_STRINGS = [
+    '1d4', '1d4 + 2', '1d6 + 2', '1d6 + 3', '1d8 + 1', '1d8 + 4', '1d10 + 2',
+    '1d12 + 5', '2d4 + 2', '2d6 + 3', '2d6 + 4', '2d8 + 5', '2d10 + 6',
+    '3d6', '3d8 + 4', '4d6', '4d8 + 4', '4d10 + 5', '2d6 + 1d6', '2d8 + 2d6',
+    '3d10 + 1d8 + 6', '8d6', '10d6', '12d6 + 20', '16d6', '18d10',
+    '7d8 + 2d10', '2d12 + 7', '3d12 + 8', '(1d10 + 5) * 2', '1d6 / 2',
+]
+
+def run(number=2000):
+    def lexer():
+        for s in DAMAGE_STRINGS:
+            list(Lexer(s).generate_tokens())
+
+    def fast():
+        for s in DAMAGE_STRINGS:
+            tokenize(s)
+
+    def lexer_parser():
+        for s in DAMAGE_STRINGS:
+            Parser(Lexer(s).generate_tokens()).parse()
+
+    def fast_parser():
+        for s in DAMAGE_STRINGS:
+            Parser(tokenize(s)).parse()
+
+    n = number*len(DAMAGE_STRINGS)
+    return {
+        'lex': (timeit.timeit(lexer, number=number)/n, timeit.timeit(fast, number=number)/n),
+        'lex+parse': (timeit.timeit(lexer_parser, number=number)/n, timeit.timeit(fast_parser, number=number)/n),
+    }
+
+if __name__ == '__main__':
+    print(f'{"stage":>10} {"Lexer (us)":>11} {"tokenize (us)":>14} {"speedup":>8}')
+    for stage, (slow, fast) in run().items():
+        print(f'{stage:>10} {1e6*slow:>11.2f} {1e6*fast:>14.2f} {slow/fast:>8.2f}')
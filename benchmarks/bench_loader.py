@@ -0,0 +1,51 @@
+"""Times loading a corpus of tree dictionaries into nodes with dict_to_node,
+against the previous recursive loader that converted its input in place.
+
+    python -m benchmarks.bench_loader
+"""
+import copy
+import sys
+import time
+from dndast import nodes
+from dndast.nodes import dict_to_node
+from .corpus import CORPUS
+
+def recursive_dict_to_node(node_dict):
+    """The previous loader, which needs a deep copy of its input to leave it unchanged.
+    """
+    if not node_dict:
+        return nodes.EmptyNode()
+    for k, v in node_dict.items():
+        if type(v) == dict:
+            node_dict[k] = recursive_dict_to_node(v)
+        elif type(v) == list:
+            for i in range(len(v)):
+                if type(v[i]) == dict:
+                    v[i] = recursive_dict_to_node(v[i])
+    if 'node' in node_dict:
+        class_name = node_dict.pop('node')
+        new_node = getattr(sys.modules[nodes.__name__], f'{class_name}Node')
+        return new_node(**node_dict)
+    else:
+        return node_dict
+
+def timed(f, trees):
+    start = time.perf_counter()
+    for tree in trees:
+        f(tree)
+    return time.perf_counter() - start
+
+def run(n=100_000):
+    corpus = list(CORPUS.values())
+    trees = [corpus[i % len(corpus)] for i in range(n)]
+    copies = [copy.deepcopy(tree) for tree in trees]
+    return [
+        ('recursive + deepcopy', timed(lambda t: recursive_dict_to_node(copy.deepcopy(t)), trees)),
+        ('recursive, in place', timed(recursive_dict_to_node, copies)),
+        ('dict_to_node', timed(dict_to_node, trees)),
+    ]
+
+if __name__ == '__main__':
+    rows = run()
+    for name, seconds in rows:
+        print(f'{name:>22} {seconds:>8.2f} s {rows[0][1]/seconds:>6.1f}x')
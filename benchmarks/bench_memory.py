@@ -0,0 +1,44 @@
+"""Measures the memory used by loaded trees, per tree and per node, with and
+without interning identical subtrees.
+
+    python -m benchmarks.bench_memory
+"""
+import gc
+import tracemalloc
+from dndast.nodes import DamageNode, dict_to_node
+from dndast.analysis import walk
+from dndast.interning import Interner
+from .corpus import CORPUS
+
+def traced(f):
+    """Returns the memory still allocated by the result of f.
+    """
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = f()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del result
+    return used
+
+def node_object_size(n=100_000):
+    """Returns the bytes per node object alone, using DamageNodes that share their field values.
+    """
+    used = traced(lambda: [DamageNode('1d6', 'fire') for _ in range(n)])
+    return (used - traced(lambda: [None for _ in range(n)]))/n
+
+def run(n=20_000):
+    sources = list(CORPUS.values())
+    nodes = sum(sum(1 for _ in walk(dict_to_node(s))) for s in sources)*n//len(sources)
+    used = traced(lambda: [dict_to_node(sources[i % len(sources)]) for i in range(n)])
+    # the interner and the trees are measured together
+    interned = traced(lambda: (lambda interner: (interner, [interner.intern(sources[i % len(sources)]) for i in range(n)]))(Interner()))
+    return n, nodes, used, node_object_size(), interned
+
+if __name__ == '__main__':
+    n, nodes, used, size, interned = run()
+    print(f'{n} trees, {nodes} nodes')
+    print(f'total: {used/2**20:.1f} MiB, {used/n:.0f} bytes/tree, {used/nodes:.0f} bytes/node including lists and dicts')
+    print(f'node objects alone: {size:.0f} bytes/node')
+    print(f'interned: {interned/2**20:.1f} MiB, {interned/n:.0f} bytes/tree')
@@ -0,0 +1,63 @@
+"""Compares MomentInterpreter against the exact Interpreter when ranking many actions.
+
+    python -m benchmarks.bench_moments
+"""
+import copy
+import time
+from dndast.nodes import *
+from dndast.interpreter import Interpreter
+from dndast.moments import MomentInterpreter
+
+TARGETS = {
+    'maxtargets': 5,
+    'melee_maxtargets': 2,
+    'melee_target': {'armor_class': 15, 'dexterity_save_bonus': 2},
+    'ranged_targetarea': 100,
+    'ranged_maxtargets': 4,
+    'ranged_target': {'armor_class': 13, 'dexterity_save_bonus': -1},
+}
+
+def action(attack_bonus, damage):
+    """A multiattack of two weapon attacks plus an area save effect.
+    """
+    attack = {
+        'node': 'Attack',
+        'targeting': {'node': 'Targeting', 'range': '5 feet', 'area': None, 'max_targets': 1, 'min_targets': 0},
+        'attack_roll': {
+            'node': 'AttackRoll',
+            'critical_hit_range': [20],
+            'critical_miss_range': [1],
+            'attack_bonus': attack_bonus,
+            'armor_class': {'node': 'Reference', 'value': 'target.armor_class'},
+        },
+        'results': {
+            'critical miss': 0,
+            'miss': 0,
+            'hit': {'node': 'Damage', 'value': damage, 'type': 'slashing'},
+            'critical hit': {'node': 'Damage', 'value': f'{damage} + {damage.split("+")[0]}', 'type': 'slashing'},
+        },
+    }
+    save = {
+        'node': 'Save',
+        'targeting': {'node': 'Targeting', 'range': '60 feet', 'area': {'shape': 'sphere', 'radius': '20 feet'}, 'max_targets': 4, 'min_targets': 0},
+        'save_roll': {'node': 'SaveRoll', 'save_dc': 8 + attack_bonus, 'save_bonus': {'node': 'Reference', 'value': 'target.dexterity_save_bonus'}},
+        'results': {'failure': {'node': 'Damage', 'value': '6d6', 'type': 'fire'}, 'success': 0.5},
+    }
+    return dict_to_node({'node': 'And', 'values': [attack, copy.deepcopy(attack), save]})
+
+def run(repeat=3):
+    trees = [action(ab, damage) for ab in range(2, 12) for damage in ['1d8+3', '2d6+4', '3d10+5', '1d12+2', '2d8+1d6+4']]
+    rows = []
+    for interpreter in [Interpreter(TARGETS), MomentInterpreter(TARGETS)]:
+        interpreter.evaluate(trees[0])
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for tree in trees:
+                interpreter.evaluate(tree)
+        rows.append((type(interpreter).__name__, (time.perf_counter() - start)/(repeat*len(trees))))
+    return rows
+
+if __name__ == '__main__':
+    rows = run()
+    for name, seconds in rows:
+        print(f'{name:>18} {1e3*seconds:>8.3f} ms/action {rows[0][1]/seconds:>8.1f}x')
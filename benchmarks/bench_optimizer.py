@@ -0,0 +1,62 @@
+"""Times evaluating trees before and after dndast.optimizer, using the corpus and
+a set of trees shaped like generated ones, with nested AndNodes, damage split
+into several DamageNodes of the same type and zero terms.
+
+    python -m benchmarks.bench_optimizer
+"""
+from dndast.nodes import dict_to_node
+from dndast.interpreter import Interpreter
+from dndast.optimizer import Optimizer
+from dndast.analysis import walk
+from .bench_suite import best_time
+from .corpus import TARGETS, attack, corpus, save
+
+# unchanged by the optimizer and slow to evaluate repeatedly
+SLOW = {'meteor_swarm'}
+
+def damage(value, damage_type):
+    return {'node': 'Damage', 'value': value, 'type': damage_type}
+
+def both(*values):
+    return {'node': 'And', 'values': list(values)}
+
+def generated():
+    """Returns {name: tree} of trees built up from separate pieces, as a generator would.
+    """
+    smite = attack(7, '1d8 + 4', '2d8 + 4')
+    smite['results']['hit'] = both(
+        damage('1d8', 'slashing'), damage('4', 'slashing'),
+        both(damage('2d8', 'radiant'), damage('1d8', 'radiant')),
+        {'node': 'Value', 'value': 0},
+    )
+    smite['results']['critical hit'] = both(
+        both(damage('1d8', 'slashing'), damage('1d8', 'slashing')), damage('4', 'slashing'),
+        both(damage('4d8', 'radiant'), both(damage('2d8', 'radiant'), {'node': 'Value', 'value': 0})),
+    )
+    sneak = attack(7, '1d6 + 4', '2d6 + 4', damage_type='piercing', range='80 feet')
+    sneak['results']['hit'] = both(damage('1d6', 'piercing'), damage('4', 'piercing'), damage('3d6', 'piercing'))
+    sneak['results']['critical hit'] = both(damage('2d6', 'piercing'), damage('4', 'piercing'), damage('6d6', 'piercing'))
+    storm = save(17, 'dexterity', '4d6', damage_type='lightning', range='120 feet', area={'shape': 'cylinder', 'radius': '10 feet'})
+    storm['results']['failure'] = both(damage('4d6', 'lightning'), damage('4d6', 'thunder'), damage('2d6', 'lightning'))
+    return {
+        'smite': smite,
+        'sneak_attack': sneak,
+        'storm': both(storm, {'node': 'Value', 'value': 0}),
+        'nested_round': both(both(smite, both(sneak)), both({'node': 'Value', 'value': 0}, both(sneak))),
+    }
+
+def main():
+    print(f'{"tree":>20} {"nodes":>13} {"before ms":>10} {"after ms":>10} {"speedup":>8}')
+    for name, tree in {**corpus(), **generated()}.items():
+        if name in SLOW:
+            continue
+        node = dict_to_node(tree)
+        optimized = Optimizer().optimize(node)
+        assert Interpreter(TARGETS).evaluate(node).equals(Interpreter(TARGETS).evaluate(optimized)), name
+        before = best_time(lambda: Interpreter(TARGETS).evaluate(node))
+        after = best_time(lambda: Interpreter(TARGETS).evaluate(optimized))
+        nodes = f'{sum(1 for _ in walk(node))} -> {sum(1 for _ in walk(optimized))}'
+        print(f'{name:>20} {nodes:>13} {1e3*before:>10.2f} {1e3*after:>10.2f} {before/after:>7.2f}x')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""Compares the peak memory of loading a JSON lines file of trees and evaluating
+it all at once against streaming it through dndast.pipeline, for growing inputs.
+
+    python -m benchmarks.bench_pipeline
+"""
+import gc
+import json
+import time
+import tracemalloc
+from dndast.nodes import dict_to_node
+from dndast.interpreter import Interpreter
+from dndast.pipeline import evaluate_stream, summarize
+from .corpus import TARGETS, corpus
+
+FAST = ['multiattack', 'crit_heavy', 'nested_selection']
+
+def lines(n):
+    """Yields n JSON lines, cycling through the quicker trees in the corpus.
+    """
+    trees = corpus()
+    for i in range(n):
+        name = FAST[i % len(FAST)]
+        yield json.dumps({'id': f'{name}-{i}', 'tree': trees[name]}) + '\n'
+
+def load_all(n):
+    nodes = [dict_to_node(json.loads(line)['tree']) for line in lines(n)]
+    interpreter = Interpreter(TARGETS)
+    results = [interpreter.evaluate(node) for node in nodes]
+    return [summarize(r) for r in results]
+
+def stream(n):
+    count = 0
+    for summary in evaluate_stream(lines(n), TARGETS):
+        count += 1
+    return count
+
+def peak(f, n):
+    """Returns (peak bytes, seconds) while running f(n).
+    """
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    f(n)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak, seconds
+
+def main():
+    print(f'{"lines":>8} {"load all MiB":>14} {"stream MiB":>12} {"stream s":>10}')
+    for n in (50, 200, 800):
+        all_peak, _ = peak(load_all, n)
+        stream_peak, seconds = peak(stream, n)
+        print(f'{n:>8} {all_peak/2**20:>14.2f} {stream_peak/2**20:>12.2f} {seconds:>10.2f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""Shows how the cost of an area save effect scales with the number of targets.
+
+Compares the interpreter's binomial failure count and direct damage mixture
+against adding a 0/1 Die per target and mapping save_damage over the joint
+outcomes of failures and damage.
+
+    python -m benchmarks.bench_save
+"""
+import math
+import time
+from icepool import map, Die
+from dndast.nodes import *
+from dndast.interpreter import Interpreter, save_outcome_table
+
+def per_target(n, save_roll, failure_damage, success_multiplier):
+    def save_damage(targets, failures, failure_damage, success_multiplier):
+        return failures*failure_damage + (targets - failures)*math.floor(success_multiplier*failure_damage)
+
+    SW = {'failure': 1, 'success': 0}
+    failures = 0
+    for _ in range(n):
+        failures += Die({SW[k]: v for k, v in save_roll.items()})
+    return map(save_damage, n, failures, failure_damage, success_multiplier)
+
+def save_tree(n, damage):
+    return SaveNode(
+        targeting=TargetingNode(range='150 feet', area={'shape': 'sphere', 'radius': '60 feet'}, max_targets=n, min_targets=0),
+        save_roll=SaveRollNode(save_dc=15, save_bonus=ReferenceNode('target.dexterity_save_bonus')),
+        results={'failure': DamageNode(damage, 'fire'), 'success': 0.5},
+    )
+
+def timed(f, *args):
+    start = time.perf_counter()
+    result = f(*args)
+    return time.perf_counter() - start, result
+
+def run(damage='8d6', counts=(1, 2, 5, 10, 20, 30, 40, 50)):
+    target = {'dexterity_save_bonus': 2}
+    targets = {'ranged_maxtargets': max(counts), 'ranged_targetarea': 1, 'ranged_target': target}
+    interpreter = Interpreter(targets)
+    failure_damage = interpreter.evaluate(DamageNode(damage, 'fire'))
+    rows = []
+    for n in counts:
+        binomial, result = timed(interpreter.evaluate, save_tree(n, damage))
+        previous, expected = timed(per_target, n, save_outcome_table(2 - 15), failure_damage, 0.5)
+        assert result.equals(expected)
+        rows.append((n, previous, binomial))
+    return rows
+
+if __name__ == '__main__':
+    print(f'{"targets":>8} {"per target (ms)":>16} {"binomial (ms)":>14} {"speedup":>8}')
+    for n, previous, binomial in run():
+        print(f'{n:>8} {1e3*previous:>16.2f} {1e3*binomial:>14.2f} {previous/binomial:>7.1f}x')
@@ -0,0 +1,115 @@
+"""Times each stage of handling the trees in benchmarks.corpus and writes the
+results as JSON, so that runs can be compared over time.
+
+    python -m benchmarks.bench_suite [--output results.json] [--baseline previous.json]
+
+Every timing is the best of --repeat runs of --number calls, in seconds per call.
+plot_tree_diagram is skipped when plotly or igraph are not installed.
+"""
+import argparse
+import json
+import platform
+import subprocess
+import time
+from dndast.nodes import dict_to_node
+from dndast.interpreter import Interpreter
+from dndast.dice_roller import Dice_Roller
+from dndast.analysis import walk
+from .corpus import TARGETS, corpus
+
+STAGES = ['dict_to_node', 'to_dict', 'evaluate', 'dice_roller', 'plot_tree_diagram']
+
+def best_time(f, setup=None, number=5, repeat=3):
+    """Returns the best time per call over repeat runs of number calls.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        args = [setup() for _ in range(number)] if setup else [()]*number
+        start = time.perf_counter()
+        for a in args:
+            f(*a)
+        best = min(best, (time.perf_counter() - start)/number)
+    return best
+
+def damage_strings(node):
+    return sorted({n.value for n in walk(node) if type(n).__name__ in ('DamageNode', 'RollNode') and type(n.value) is str})
+
+def load_plotter():
+    try:
+        from dndast.plotter import plot_tree_diagram
+    except ImportError:
+        return None
+    return plot_tree_diagram
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(number=5, repeat=3, stages=STAGES):
+    plot_tree_diagram = load_plotter()
+    results = []
+    for name, tree in corpus().items():
+        node = dict_to_node(tree)
+        timings = {}
+        if 'dict_to_node' in stages:
+            timings['dict_to_node'] = best_time(lambda: dict_to_node(tree), None, number, repeat)
+        if 'to_dict' in stages:
+            timings['to_dict'] = best_time(node.to_dict, None, number, repeat)
+        if 'evaluate' in stages:
+            timings['evaluate'] = best_time(lambda: Interpreter(TARGETS).evaluate(node), None, number, repeat)
+        if 'dice_roller' in stages:
+            strings = damage_strings(node)
+            timings['dice_roller'] = best_time(lambda: [Dice_Roller(s).value for s in strings], None, number, repeat)
+        if 'plot_tree_diagram' in stages:
+            timings['plot_tree_diagram'] = best_time(plot_tree_diagram, lambda: (node,), 1, repeat) if plot_tree_diagram else None
+        results.append({'tree': name, 'nodes': sum(1 for _ in walk(node)), 'seconds': timings})
+    return {
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'number': number,
+        'repeat': repeat,
+        'results': results,
+    }
+
+def compare(current, baseline):
+    """Returns {(tree, stage): current/baseline} for every timing present in both runs.
+    """
+    previous = {r['tree']: r['seconds'] for r in baseline['results']}
+    ratios = {}
+    for r in current['results']:
+        for stage, seconds in r['seconds'].items():
+            before = previous.get(r['tree'], {}).get(stage)
+            if seconds is not None and before:
+                ratios[(r['tree'], stage)] = seconds/before
+    return ratios
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--baseline', help='a previous JSON output to compare against')
+    parser.add_argument('--number', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES)
+    args = parser.parse_args(argv)
+
+    results = run(args.number, args.repeat, args.stages)
+    ratios = compare(results, json.load(open(args.baseline))) if args.baseline else {}
+
+    print(f'{"tree":>20} {"stage":>18} {"ms/call":>10}' + (f' {"vs baseline":>12}' if ratios else ''))
+    for r in results['results']:
+        for stage, seconds in r['seconds'].items():
+            line = f'{r["tree"]:>20} {stage:>18} ' + (f'{1e3*seconds:>10.3f}' if seconds is not None else f'{"skipped":>10}')
+            if (r['tree'], stage) in ratios:
+                line += f' {ratios[(r["tree"], stage)]:>11.2f}x'
+            print(line)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    main()
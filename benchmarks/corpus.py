@@ -0,0 +1,140 @@
+"""A corpus of representative action trees in dictionary form.
+
+Trees are returned as fresh copies, so that callers can modify them freely.
+"""
+import copy
+
+TARGETS = {
+    'maxtargets': 5,
+    'melee_maxtargets': 2,
+    'melee_target': {
+        'armor_class': 16,
+        'strength_save_bonus': 3,
+        'dexterity_save_bonus': 1,
+        'constitution_save_bonus': 4,
+        'wisdom_save_bonus': 0,
+    },
+    'ranged_targetarea': 10**2,
+    'ranged_maxtargets': 20,
+    'ranged_target': {
+        'armor_class': 14,
+        'strength_save_bonus': 1,
+        'dexterity_save_bonus': 2,
+        'constitution_save_bonus': 2,
+        'wisdom_save_bonus': 1,
+    },
+}
+
+def targeting(range='5 feet', area=None, max_targets=1):
+    return {'node': 'Targeting', 'range': range, 'area': area, 'max_targets': max_targets, 'min_targets': 0}
+
+def attack(attack_bonus, hit, critical_hit, critical_hit_range=(20,), damage_type='slashing', **kwargs):
+    return {
+        'node': 'Attack',
+        'targeting': targeting(**kwargs),
+        'attack_roll': {
+            'node': 'AttackRoll',
+            'critical_hit_range': list(critical_hit_range),
+            'critical_miss_range': [1],
+            'attack_bonus': attack_bonus,
+            'armor_class': {'node': 'Reference', 'value': 'target.armor_class'},
+        },
+        'results': {
+            'critical miss': 0,
+            'miss': 0,
+            'hit': {'node': 'Damage', 'value': hit, 'type': damage_type},
+            'critical hit': {'node': 'Damage', 'value': critical_hit, 'type': damage_type},
+        },
+    }
+
+def save(save_dc, ability, failure, success=0.5, damage_type='fire', **kwargs):
+    return {
+        'node': 'Save',
+        'targeting': targeting(**kwargs),
+        'save_roll': {
+            'node': 'SaveRoll',
+            'save_dc': save_dc,
+            'save_bonus': {'node': 'Reference', 'value': f'target.{ability}_save_bonus'},
+        },
+        'results': {
+            'failure': {'node': 'Damage', 'value': failure, 'type': damage_type},
+            'success': success,
+        },
+    }
+
+CORPUS = {
+    # a fighter's extra attacks
+    'multiattack': {'node': 'And', 'values': [
+        attack(9, '1d8 + 5', '2d8 + 5'),
+        attack(9, '1d8 + 5', '2d8 + 5'),
+        attack(9, '1d8 + 5', '2d8 + 5'),
+        attack(9, '1d4 + 5', '2d4 + 5', damage_type='bludgeoning'),
+    ]},
+    # a monster's bite, claws and tail
+    'monster_multiattack': {'node': 'And', 'values': [
+        attack(11, '2d10 + 6 + 2d8', '4d10 + 6 + 4d8', damage_type='piercing', range='10 feet'),
+        attack(11, '2d6 + 6', '4d6 + 6', range='5 feet', max_targets=2),
+        attack(11, '2d6 + 6', '4d6 + 6', range='5 feet', max_targets=2),
+        attack(11, '2d8 + 6', '4d8 + 6', damage_type='bludgeoning', range='15 feet'),
+    ]},
+    # an expanded critical range with extra dice on a critical hit
+    'crit_heavy': {'node': 'And', 'values': [
+        attack(8, '1d10 + 4 + 3d6', '2d10 + 4 + 6d6 + 1d8', critical_hit_range=range(17, 21), damage_type='piercing', range='150 feet', max_targets=1),
+        attack(8, '1d10 + 4', '2d10 + 4 + 1d8', critical_hit_range=range(17, 21), damage_type='piercing', range='150 feet', max_targets=1),
+    ]},
+    'fireball': save(15, 'dexterity', '8d6', range='150 feet', area={'shape': 'sphere', 'radius': '20 feet'}, max_targets=20),
+    'cone_of_cold': save(17, 'constitution', '8d8', damage_type='cold', range='60 feet', area={'shape': 'cone', 'length': '60 feet'}, max_targets=20),
+    'meteor_swarm': {'node': 'And', 'values': [
+        save(19, 'dexterity', '20d6', range='5280 feet', area={'shape': 'sphere', 'radius': '40 feet'}, max_targets=20),
+        save(19, 'dexterity', '20d6', damage_type='bludgeoning', range='5280 feet', area={'shape': 'sphere', 'radius': '40 feet'}, max_targets=20),
+    ]},
+    # a poisoned bite, whose poison damage depends on a save made only on a hit
+    'nested_selection': {'node': 'Attack',
+        'targeting': targeting(),
+        'attack_roll': {
+            'node': 'AttackRoll',
+            'critical_hit_range': [20],
+            'critical_miss_range': [1],
+            'attack_bonus': 6,
+            'armor_class': {'node': 'Reference', 'value': 'target.armor_class'},
+        },
+        'results': {
+            'critical miss': 0,
+            'miss': 0,
+            'hit': {'node': 'And', 'values': [
+                {'node': 'Damage', 'value': '1d10 + 3', 'type': 'piercing'},
+                {'node': 'Selection',
+                    'selector': {'node': 'SaveRoll', 'save_dc': 13, 'save_bonus': 2},
+                    'results': {
+                        'failure': {'node': 'Damage', 'value': '3d6', 'type': 'poison'},
+                        'success': {'node': 'Selection',
+                            'selector': {'node': 'SaveRoll', 'save_dc': 8, 'save_bonus': 2},
+                            'results': {'failure': {'node': 'Damage', 'value': '1d6', 'type': 'poison'}, 'success': 0},
+                        },
+                    },
+                },
+            ]},
+            'critical hit': {'node': 'And', 'values': [
+                {'node': 'Damage', 'value': '2d10 + 3', 'type': 'piercing'},
+                {'node': 'Selection',
+                    'selector': {'node': 'SaveRoll', 'save_dc': 13, 'save_bonus': 2},
+                    'results': {
+                        'failure': {'node': 'Damage', 'value': '6d6', 'type': 'poison'},
+                        'success': 0,
+                    },
+                },
+            ]},
+        },
+    },
+    # a breath weapon used alongside a round of attacks
+    'dragon_turn': {'node': 'And', 'values': [
+        save(18, 'dexterity', '12d6', range='60 feet', area={'shape': 'cone', 'length': '60 feet'}, max_targets=20),
+        attack(11, '2d10 + 6', '4d10 + 6', damage_type='piercing', range='10 feet'),
+        attack(11, '2d6 + 6', '4d6 + 6'),
+    ]},
+}
+
+def corpus():
+    """Returns {name: tree} with a fresh copy of every tree dictionary.
+    """
+    return copy.deepcopy(CORPUS)
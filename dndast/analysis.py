@@ -0,0 +1,161 @@
+"""
+Structural analysis of node trees, used to build cache keys and to find which
+target fields a subtree depends on.
+"""
+from collections.abc import Mapping
+from dataclasses import fields
+from functools import lru_cache
+from .nodes import *
+
+def is_node(value):
+    return type(value) in NODE_TYPES
+
+
+def children(node):
+    """Yields the nodes directly below node, including those inside lists and dicts.
+    """
+    for f in fields(node):
+        value = getattr(node, f.name)
+        if is_node(value):
+            yield value
+        elif type(value) is list:
+            yield from (v for v in value if is_node(v))
+        elif type(value) is dict:
+            yield from (v for v in value.values() if is_node(v))
+
+
+def walk(node):
+    """Yields node and every node below it.
+    """
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(children(node))
+
+
+def freeze(value):
+    """Converts a value into a hashable form that compares equal only for structurally equal values.
+    The items of mappings are sorted by key, so the result does not depend on insertion order.
+    """
+    if is_node(value):
+        return structure_key(value)
+    if isinstance(value, Mapping):
+        # frozen keys are distinct and start with their type name, so sorting never compares values
+        return ('dict',) + tuple(sorted((freeze(k), freeze(v)) for k, v in value.items()))
+    if type(value) in (list, tuple):
+        return ('list',) + tuple(freeze(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return ('set', frozenset(freeze(v) for v in value))
+    return (type(value).__name__, value)
+
+
+def structure_key(node):
+    """Returns a hashable key, made of nested tuples, that is equal only for structurally
+    equal node trees. It is cheap to build and used for in-memory caches; see
+    interning.fingerprint for the stable digest used for anything persisted.
+    """
+    return (type(node).__name__,) + tuple(freeze(getattr(node, f.name)) for f in fields(node))
+
+
+def references(node):
+    """Returns the set of reference paths, e.g. 'target.armor_class', read anywhere in the tree.
+    """
+    return {n.value for n in walk(node) if type(n) is ReferenceNode}
+
+
+def targeting_nodes(node):
+    return [n for n in walk(node) if type(n) is TargetingNode]
+
+
+def compile_lookup(keys):
+    """Returns a function looking keys up in nested mappings, unrolled for the common depths.
+    """
+    root, rest = keys[0], keys[1:]
+    if not rest:
+        def lookup(context):
+            return context.get(root, None) or None
+    elif len(rest) == 1:
+        key = rest[0]
+        def lookup(context):
+            value = context.get(root, None)
+            if not value or not isinstance(value, Mapping): return None
+            return value.get(key, None)
+    else:
+        def lookup(context):
+            value = context.get(root, None)
+            if not value: return None
+            for key in rest:
+                if not isinstance(value, Mapping): return None
+                value = value.get(key, None)
+                if value is None: return None
+            return value
+    return lookup
+
+
+class Accessor:
+    """A reference path, e.g. 'target.saves.dex', split into its keys once.
+        get: (function) Looks the path up in a dict of named values, returning None if any part of it is missing.
+    """
+    __slots__ = ('path', 'keys', 'get')
+
+    def __init__(self, path):
+        self.path = path
+        self.keys = tuple(path.split('.'))
+        self.get = compile_lookup(self.keys)
+
+    def __repr__(self):
+        return f'Accessor({self.path!r})'
+
+    def __call__(self, context):
+        return self.get(context)
+
+    @property
+    def root(self):
+        return self.keys[0]
+
+    @property
+    def field(self):
+        """The path below the root, e.g. 'saves.dex', or None for a bare name.
+        """
+        return '.'.join(self.keys[1:]) or None
+
+
+@lru_cache(maxsize=4096)
+def accessor(path):
+    """Returns the shared Accessor for a reference path.
+    """
+    return Accessor(path)
+
+
+def resolve_reference(path, context):
+    """Looks up a reference path such as 'target.armor_class' in a dict of named values.
+    """
+    return accessor(path)(context)
+
+
+def dependencies(node):
+    """Returns the fields read anywhere in the tree, grouped by root name,
+    e.g. {'target': {'armor_class', 'saves.dex'}}.
+    """
+    fields = {}
+    for path in references(node):
+        a = accessor(path)
+        fields.setdefault(a.root, set())
+        if a.field is not None:
+            fields[a.root].add(a.field)
+    return fields
+
+
+def set_reference(context, path, value):
+    """Returns a copy of context with the reference path set to value, copying
+    every dict along the path rather than modifying it.
+    """
+    keys = path.split('.')
+    context = dict(context)
+    current = context
+    for key in keys[:-1]:
+        current[key] = dict(current.get(key) or {})
+        current = current[key]
+    current[keys[-1]] = value
+    return context
@@ -0,0 +1,232 @@
+"""
+A compact binary format for node trees.
+
+A stream starts with b'DAST' and a version byte. Each value then starts with a
+one byte opcode:
+    0x00-0x0e: a node, by its position in NODE_LIST, followed by its fields in order.
+    0x40-0x42: None, False and True.
+    0x43: an int, as a zigzag varint.
+    0x44: a float, as a little-endian double.
+    0x45: a new string, as a varint byte length and UTF-8, which is added to the string table.
+    0x46: a repeated string, as a varint index into the string table.
+    0x47: a list, as a varint length and its items.
+    0x48: a dict, as a varint length and its keys and values.
+Strings such as damage types, reference paths and result names are only stored
+once per stream, so a stream of many trees is much smaller than its JSON.
+"""
+import struct
+from dataclasses import fields
+from .nodes import *
+
+MAGIC = b'DAST'
+VERSION = 1
+
+NONE, FALSE, TRUE, INT, FLOAT, STRING, STRING_REF, LIST, DICT = range(0x40, 0x49)
+
+NODE_OPCODES = {NODE_CLASSES[name.removesuffix('Node')]: i for i, name in enumerate(NODE_LIST)}
+NODE_FIELDS = {node_class: tuple(f.name for f in fields(node_class)) for node_class in NODE_OPCODES}
+OPCODE_NODES = [(node_class, NODE_FIELDS[node_class]) for node_class in NODE_OPCODES]
+
+DOUBLE = struct.Struct('<d')
+
+class Encoder:
+    """Writes values to a binary stream, sharing one string table between them.
+    """
+    def __init__(self):
+        self.out = bytearray(MAGIC)
+        self.out.append(VERSION)
+        self.strings = {}
+
+    def getvalue(self):
+        return bytes(self.out)
+
+    def varint(self, n):
+        out = self.out
+        while n > 0x7f:
+            out.append((n & 0x7f) | 0x80)
+            n >>= 7
+        out.append(n)
+
+    def write(self, value):
+        out = self.out
+        t = type(value)
+        if t in NODE_OPCODES:
+            out.append(NODE_OPCODES[t])
+            for name in NODE_FIELDS[t]:
+                self.write(getattr(value, name))
+        elif t is str:
+            index = self.strings.get(value)
+            if index is None:
+                self.strings[value] = len(self.strings)
+                encoded = value.encode()
+                out.append(STRING)
+                self.varint(len(encoded))
+                out += encoded
+            else:
+                out.append(STRING_REF)
+                self.varint(index)
+        elif value is None:
+            out.append(NONE)
+        elif t is bool:
+            out.append(TRUE if value else FALSE)
+        elif t is int:
+            out.append(INT)
+            self.varint(2*value if value >= 0 else -2*value - 1)
+        elif t is float:
+            out.append(FLOAT)
+            out += DOUBLE.pack(value)
+        elif t is list:
+            out.append(LIST)
+            self.varint(len(value))
+            for v in value:
+                self.write(v)
+        elif t is dict:
+            out.append(DICT)
+            self.varint(len(value))
+            for k, v in value.items():
+                self.write(k)
+                self.write(v)
+        else:
+            raise TypeError(f'cannot encode {t.__name__} values')
+
+
+def make_reader(data, pos):
+    """Returns (read, tell) functions that decode values from data starting at pos
+    and report the current position. The state lives in closures rather than on an
+    object, which makes decoding about a third faster.
+    """
+    strings = []
+    nodes = OPCODE_NODES
+    node_count = len(nodes)
+    end = len(data)
+
+    def truncated():
+        return ValueError(f'truncated dndast binary stream at byte {pos}')
+
+    def varint():
+        nonlocal pos
+        if pos >= end:
+            raise truncated()
+        b = data[pos]
+        pos += 1
+        if b < 0x80:
+            return b
+        n = b & 0x7f
+        shift = 7
+        while b & 0x80:
+            if pos >= end:
+                raise truncated()
+            b = data[pos]
+            pos += 1
+            n |= (b & 0x7f) << shift
+            shift += 7
+        return n
+
+    def read():
+        nonlocal pos
+        if pos >= end:
+            raise truncated()
+        op = data[pos]
+        pos += 1
+        if op < node_count:
+            node_class, names = nodes[op]
+            return node_class(*[read() for _ in names])
+        if op == STRING_REF:
+            i = varint()
+            if i >= len(strings):
+                raise ValueError(f'invalid string reference {i} at byte {pos}')
+            return strings[i]
+        if op == INT:
+            z = varint()
+            return z >> 1 if not z & 1 else -(z >> 1) - 1
+        if op == STRING:
+            n = varint()
+            if pos + n > end:
+                raise truncated()
+            value = data[pos:pos + n].decode()
+            pos += n
+            strings.append(value)
+            return value
+        if op == LIST:
+            return [read() for _ in range(varint())]
+        if op == DICT:
+            value = {}
+            for _ in range(varint()):
+                k = read()
+                value[k] = read()
+            return value
+        if op == NONE:
+            return None
+        if op == FALSE or op == TRUE:
+            return op == TRUE
+        if op == FLOAT:
+            if pos + DOUBLE.size > end:
+                raise truncated()
+            value = DOUBLE.unpack_from(data, pos)[0]
+            pos += DOUBLE.size
+            return value
+        raise ValueError(f'invalid opcode {op:#04x} at byte {pos - 1}')
+
+    def tell():
+        return pos
+
+    return read, tell
+
+
+class Decoder:
+    """Reads values back from a binary stream written by an Encoder.
+    """
+    def __init__(self, data):
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError('not a dndast binary stream')
+        if len(data) <= len(MAGIC):
+            raise ValueError('truncated dndast binary stream, missing the version byte')
+        if data[len(MAGIC)] != VERSION:
+            raise ValueError(f'unsupported binary format version {data[len(MAGIC)]}')
+        self.data = data
+        self.read, self.tell = make_reader(data, len(MAGIC) + 1)
+
+    def at_end(self):
+        return self.tell() >= len(self.data)
+
+
+def as_node(tree):
+    return dict_to_node(tree) if type(tree) is dict else tree
+
+
+def dumps(tree):
+    """Encodes a node tree, or a tree in dictionary form, as bytes.
+    """
+    encoder = Encoder()
+    encoder.write(as_node(tree))
+    return encoder.getvalue()
+
+
+def loads(data):
+    """Decodes a node tree written by dumps. Raises ValueError if data holds
+    anything after the tree; use loads_all for streams of several trees.
+    """
+    decoder = Decoder(data)
+    tree = decoder.read()
+    if not decoder.at_end():
+        raise ValueError(f'unexpected data after the tree at byte {decoder.tell()}')
+    return tree
+
+
+def dumps_all(trees):
+    """Encodes a sequence of trees into one stream with a shared string table.
+    """
+    encoder = Encoder()
+    for tree in trees:
+        encoder.write(as_node(tree))
+    return encoder.getvalue()
+
+
+def loads_all(data):
+    """Decodes every tree in a stream written by dumps_all.
+    """
+    decoder = Decoder(data)
+    trees = []
+    while not decoder.at_end():
+        trees.append(decoder.read())
+    return trees
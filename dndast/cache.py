@@ -0,0 +1,173 @@
+"""
+A persistent cache of evaluated trees, stored in SQLite.
+
+Results are keyed by Interpreter.result_key, a digest of the tree's structure
+and of the target values and settings it reads, so one cache can be shared
+between runs and processes and between different targets dicts. Every entry
+records the interpreter class and VERSION that produced it, and is only read
+back for that version, so processes running different versions can share a
+cache. ResultCache.prune deletes the entries of other versions. Dice are stored as
+their outcomes and quantities in the dndast.binary format, compressed with zlib.
+The least recently used entries are evicted once the stored data exceeds max_bytes.
+"""
+import sqlite3
+import time
+import zlib
+from icepool import Die
+from .binary import Decoder, Encoder
+
+# stored as the database's user_version, tables of other versions are dropped and recreated
+SCHEMA_VERSION = 2
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT NOT NULL,
+    version TEXT NOT NULL,
+    data BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    used REAL NOT NULL,
+    PRIMARY KEY (key, version)
+);
+CREATE INDEX IF NOT EXISTS results_used ON results (used);
+"""
+
+DIE, VALUE = 0, 1
+MISSING = object()
+
+def encode_result(result):
+    """Returns result as compressed bytes, or None for results that cannot be stored.
+    """
+    encoder = Encoder()
+    if isinstance(result, Die):
+        encoder.write(DIE)
+        encoder.write(list(result.outcomes()))
+        encoder.write(list(result.quantities()))
+    elif result is None or type(result) in (int, float, str):
+        encoder.write(VALUE)
+        encoder.write(result)
+    else:
+        return None
+    return zlib.compress(encoder.getvalue())
+
+
+def decode_result(data):
+    decoder = Decoder(zlib.decompress(data))
+    if decoder.read() == DIE:
+        outcomes = decoder.read()
+        return Die(dict(zip(outcomes, decoder.read())))
+    return decoder.read()
+
+
+class ResultCache:
+    """Stores Interpreter results in an SQLite database.
+        path: (str) The database file, created if missing. ':memory:' keeps it in memory.
+        max_bytes: (int) The most compressed result data kept before evicting. None means unbounded.
+    """
+    def __init__(self, path, max_bytes=256*2**20):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        if self.connection.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:
+            self.connection.execute('DROP TABLE IF EXISTS results')
+            self.connection.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+        self.connection.executescript(SCHEMA)
+        self.hits = 0
+        self.misses = 0
+        self.versions = set()
+        self.stored = self.size()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.connection.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+
+    def close(self):
+        self.connection.close()
+
+    def version_of(self, interpreter):
+        """Returns the version tag of an interpreter, e.g. 'Interpreter:2', and records it as used.
+        """
+        version = f'{type(interpreter).__name__}:{interpreter.VERSION}'
+        self.versions.add(version)
+        return version
+
+    def prune(self, keep=None):
+        """Deletes the entries of every version tag not in keep, by default the tags
+        this cache has been used with. Returns the number deleted.
+        """
+        keep = sorted(self.versions if keep is None else keep)
+        placeholders = ', '.join('?'*len(keep))
+        deleted = self.connection.execute(f'DELETE FROM results WHERE version NOT IN ({placeholders})', keep).rowcount
+        self.stored = self.size()
+        return deleted
+
+    def get(self, key, version, default=None):
+        row = self.connection.execute('SELECT data FROM results WHERE key = ? AND version = ?', (key, version)).fetchone()
+        if row is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self.connection.execute('UPDATE results SET used = ? WHERE key = ? AND version = ?', (time.time(), key, version))
+        return decode_result(row[0])
+
+    def put(self, key, version, result):
+        data = encode_result(result)
+        if data is None:
+            return
+        # a replaced entry only changes the total by the difference in size
+        row = self.connection.execute('SELECT size FROM results WHERE key = ? AND version = ?', (key, version)).fetchone()
+        self.connection.execute(
+            'INSERT OR REPLACE INTO results (key, version, data, size, used) VALUES (?, ?, ?, ?, ?)',
+            (key, version, data, len(data), time.time()),
+        )
+        self.stored += len(data) - (row[0] if row is not None else 0)
+        if self.max_bytes is not None and self.stored > self.max_bytes:
+            self.evict()
+
+    def size(self):
+        """Returns the total bytes of stored result data.
+        """
+        return self.connection.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+
+    def evict(self, max_bytes=None):
+        """Deletes the least recently used entries until the stored data fits in
+        max_bytes, by default the cache's own limit. Returns the number deleted.
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        if max_bytes is None:
+            return 0
+        # other processes may share the database, so the total is recounted rather than trusted
+        self.stored = self.size()
+        excess = self.stored - max_bytes
+        keys = []
+        if excess > 0:
+            for key, version, size in self.connection.execute('SELECT key, version, size FROM results ORDER BY used'):
+                keys.append((key, version))
+                self.stored -= size
+                excess -= size
+                if excess <= 0:
+                    break
+            self.connection.executemany('DELETE FROM results WHERE key = ? AND version = ?', keys)
+        return len(keys)
+
+    def clear(self):
+        self.connection.execute('DELETE FROM results')
+        self.hits = self.misses = self.stored = 0
+
+    def info(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self), 'bytes': self.size()}
+
+    def evaluate(self, interpreter, node, **kwargs):
+        """Returns interpreter.evaluate(node, **kwargs), reusing a stored result if there is one.
+        """
+        version = self.version_of(interpreter)
+        key = interpreter.result_key(node, **kwargs)
+        result = self.get(key, version, MISSING)
+        if result is MISSING:
+            result = interpreter.evaluate(node, **kwargs)
+            self.put(key, version, result)
+        return result
@@ -1,3 +1,6 @@
 from .dice_roller import Dice_Roller
+from .cache import LRUCache
+from .compiler import Compiler
+from .optimizer import Optimizer
 
-__all__ = ['Dice_Roller']
\ No newline at end of file
+__all__ = ['Compiler', 'Dice_Roller', 'LRUCache', 'Optimizer']
\ No newline at end of file
@@ -0,0 +1,53 @@
+from functools import lru_cache
+from icepool import d
+
+@lru_cache(maxsize=256)
+def icepool_die(count, sides, reroll=None, keep_highest=None, keep_lowest=None):
+    """Returns the exact distribution of a pool of dice.
+
+    Keeping the highest or lowest dice uses icepool's order-statistic evaluation,
+    whose cost grows polynomially with the pool size rather than enumerating
+    every combination of rolls.
+    """
+    die = d(sides)
+    if reroll is not None:
+        die = die.reroll(range(1, reroll), depth=1)
+    if keep_highest is not None:
+        return die.highest(count, keep_highest)
+    if keep_lowest is not None:
+        return die.lowest(count, keep_lowest)
+    return count @ die
+
+@lru_cache(maxsize=256)
+def icepool_number(value):
+    return float(value) * d(1)
+
+class IcepoolBackend:
+    """Exact distributions built from icepool dice with integer weights.
+    """
+    name = 'icepool'
+
+    def die(self, count, sides, reroll=None, keep_highest=None, keep_lowest=None):
+        return icepool_die(count, sides, reroll, keep_highest, keep_lowest)
+
+    def number(self, value):
+        return icepool_number(value)
+
+def get_backend(backend):
+    """Returns a backend instance given either its name or an existing backend.
+        backend: (str, backend) One of 'icepool', 'fft' or 'moments', or an object with die() and number() methods.
+    """
+    if not isinstance(backend, str):
+        return backend
+
+    match backend:
+        case 'icepool':
+            return IcepoolBackend()
+        case 'fft':
+            from .fft import FFTBackend
+            return FFTBackend()
+        case 'moments':
+            from .moments import MomentsBackend
+            return MomentsBackend()
+        case _:
+            raise ValueError(f'{backend!r} is not a known backend')
@@ -0,0 +1,61 @@
+import operator
+from .nodes import *
+from .backends import get_backend
+
+class Compiler:
+    """Compiles a dice expression tree into a single callable.
+
+    Node dispatch happens once, at compile time, so the returned program can be
+    re-run without walking the tree again, optionally with a different backend.
+    """
+    def compile(self, node):
+        code = self.compile_node(node)
+
+        def program(backend='icepool'):
+            return code(get_backend(backend))
+        return program
+
+    def compile_node(self, node):
+        method_name = f'compile_{type(node).__name__}'
+        method = getattr(self, method_name)
+        return method(node)
+
+    def compile_DieNode(self, node):
+        args = (node.count, node.sides, node.reroll, node.keep_highest, node.keep_lowest)
+        return lambda backend: backend.die(*args)
+
+    def compile_NumberNode(self, node):
+        number = node.number
+        return lambda backend: backend.number(number)
+
+    def compile_AddNode(self, node):
+        return self.compile_binary(node, operator.add)
+
+    def compile_SubtractNode(self, node):
+        return self.compile_binary(node, operator.sub)
+
+    def compile_MultiplyNode(self, node):
+        return self.compile_binary(node, operator.mul)
+
+    def compile_DivideNode(self, node):
+        node_a = self.compile_node(node.node_a)
+        node_b = self.compile_node(node.node_b)
+
+        def divide(backend):
+            try:
+                return node_a(backend) / node_b(backend)
+            except:
+                raise Exception('Runtime math error')
+        return divide
+
+    def compile_PlusNode(self, node):
+        return self.compile_node(node.node)
+
+    def compile_MinusNode(self, node):
+        operand = self.compile_node(node.node)
+        return lambda backend: -operand(backend)
+
+    def compile_binary(self, node, op):
+        node_a = self.compile_node(node.node_a)
+        node_b = self.compile_node(node.node_b)
+        return lambda backend: op(node_a(backend), node_b(backend))
@@ -1,10 +1,73 @@
-from .lexer import Lexer
+from functools import cached_property
+from .lexer import tokenize
 from .parser_ import Parser
-from .interpreter import Interpreter
+from .optimizer import Optimizer
+from .compiler import Compiler
+from .backends import get_backend
+from .cache import LRUCache
+
+def normalize(eq_str):
+    """Returns the token stream of a dice equation as a cache key, so spellings that only
+    differ in whitespace share a key but '1 2d6' and '12d6' do not. Numbers are keyed by
+    their repr, since 4 and 4.0 roll different outcome types.
+    """
+    return tuple((kind, repr(value)) for kind, value in tokenize(eq_str))
 
 class Dice_Roller:
-    def __init__(self, eq_str):
+    """Parses and evaluates a dice equation.
+        eq_str: (str) The dice equation, e.g. '2d8 + 3'.
+        backend: (str, backend) 'icepool' for exact dice, 'fft' for float64 probability arrays
+            or 'moments' for just the mean and variance.
+        optimize: (bool) Simplify the parsed expression before it is evaluated.
+        lazy: (bool) Leave the distribution to be built on first access of value, for
+            rollers that are only sampled from.
+    """
+    cache = LRUCache(maxsize=1024)
+
+    def __init__(self, eq_str, backend='icepool', optimize=True, lazy=False):
         self.eq_str = eq_str
-        self.tokens = Lexer(self.eq_str).generate_tokens()
+        self.backend = get_backend(backend)
+        self.tokens = tokenize(self.eq_str)
         self.tree = Parser(self.tokens).parse()
-        self.value = Interpreter().evaluate(self.tree)
\ No newline at end of file
+        if optimize:
+            self.tree = Optimizer().optimize(self.tree)
+        self.program = Compiler().compile(self.tree)
+        if not lazy:
+            self.value = self.program(self.backend)
+
+    @cached_property
+    def value(self):
+        return self.program(self.backend)
+
+    def sample(self, n, rng=None):
+        """Draws n rolls of the equation without building its distribution.
+            n: (int) The number of rolls.
+            rng: (int, Generator) A seed or numpy Generator, for reproducible rolls.
+        """
+        from .sampler import Sampler
+        return Sampler(rng).sample(self.tree, n)
+
+    @classmethod
+    def cached(cls, eq_str, backend='icepool', lazy=False):
+        """Returns a Dice_Roller for eq_str, reusing a previously built one when possible.
+        A lazy roller that is reused builds its distribution when value is first accessed.
+        """
+        name = backend if isinstance(backend, str) else backend.name
+        key = (normalize(eq_str), name)
+        roller = cls.cache.get(key)
+        if roller is None:
+            roller = cls(eq_str, backend=backend, lazy=lazy)
+            cls.cache.put(key, roller)
+        return roller
+
+    @classmethod
+    def cache_info(cls):
+        return cls.cache.info()
+
+    @classmethod
+    def cache_clear(cls):
+        cls.cache.clear()
+
+    @classmethod
+    def cache_resize(cls, maxsize):
+        cls.cache.resize(maxsize)
@@ -0,0 +1,200 @@
+"""Float64 convolution backend for large dice pools.
+
+Distributions are stored as an array of probabilities over consecutive integer
+outcomes starting at an integer offset. A pool of NdM is computed by raising the
+Fourier transform of a single die to the N-th power, so it costs one FFT of
+length N*(M-1)+1 however many dice are rolled. Sums of distributions are
+convolved directly when one side is short and through an FFT otherwise.
+
+Accuracy against the exact icepool result: every probability carries an
+absolute error of a few machine epsilons (2.2e-16) times log2 of the array
+length. For pools of up to a few thousand outcomes (e.g. 40d10, 100d20) the
+largest absolute error is below 1e-13, so means, variances and quantiles agree
+with icepool to at least 12 significant figures. Relative accuracy is lost for
+outcomes whose probability is itself below ~1e-13, i.e. the far tails of large
+pools; those are clipped to zero rather than reported as negative.
+
+Only integer outcomes can be represented. Division is supported when it is
+exact, and anything else raises a ValueError.
+"""
+from functools import lru_cache
+import numpy as np
+from .backends import icepool_die
+
+SMALL_CONVOLUTION = 64
+
+def as_integer(value):
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, (float, np.floating)) and float(value).is_integer():
+        return int(value)
+    raise ValueError(f'the fft backend only supports integer outcomes, got {value!r}')
+
+def clip(probabilities):
+    """Removes the small negative values FFT round-off leaves in empty outcomes.
+    """
+    np.clip(probabilities, 0.0, None, out=probabilities)
+    return probabilities
+
+def convolve(a, b):
+    if min(len(a), len(b)) <= SMALL_CONVOLUTION:
+        return np.convolve(a, b)
+    n = len(a) + len(b) - 1
+    return clip(np.fft.irfft(np.fft.rfft(a, n) * np.fft.rfft(b, n), n))
+
+class Distribution:
+    """A distribution over the integers offset, offset+1, ..., offset+len(probabilities)-1.
+        probabilities: (array) The probability of each outcome.
+        offset: (int) The smallest outcome.
+    """
+    def __init__(self, probabilities, offset=0):
+        self.probabilities = np.asarray(probabilities, dtype=np.float64)
+        self.offset = int(offset)
+
+    @classmethod
+    def constant(cls, value):
+        return cls(np.ones(1), as_integer(value))
+
+    @classmethod
+    def from_die(cls, die):
+        """Converts an icepool Die with integer outcomes.
+        """
+        outcomes = [as_integer(o) for o in die.outcomes()]
+        offset = min(outcomes)
+        probabilities = np.zeros(max(outcomes) - offset + 1)
+        denominator = die.denominator()
+        for outcome, quantity in zip(outcomes, die.quantities()):
+            probabilities[outcome - offset] += quantity/denominator
+        return cls(probabilities, offset)
+
+    def __len__(self):
+        return len(self.probabilities)
+
+    def __repr__(self):
+        return f'Distribution(offset={self.offset}, outcomes={len(self)}, mean={self.mean():g})'
+
+    def outcomes(self):
+        return np.arange(self.offset, self.offset + len(self))
+
+    def items(self):
+        """Returns (outcome, probability) pairs for every outcome with a non-zero probability.
+        """
+        return [(int(o), float(p)) for o, p in zip(self.outcomes(), self.probabilities) if p > 0]
+
+    def probability(self, outcome):
+        i = outcome - self.offset
+        if 0 <= i < len(self):
+            return float(self.probabilities[i])
+        return 0.0
+
+    def mean(self):
+        return float(self.outcomes() @ self.probabilities)
+
+    def variance(self):
+        deviation = self.outcomes() - self.mean()
+        return float(deviation**2 @ self.probabilities)
+
+    def sd(self):
+        return self.variance()**0.5
+
+    def is_constant(self):
+        return len(self) == 1
+
+    def scale(self, k):
+        """Multiplies every outcome by the integer k.
+        """
+        if k == 0:
+            return Distribution.constant(0)
+        if k < 0:
+            return (-self).scale(-k)
+        probabilities = np.zeros((len(self) - 1)*k + 1)
+        probabilities[::k] = self.probabilities
+        return Distribution(probabilities, self.offset*k)
+
+    def product(self, other):
+        outcomes = np.multiply.outer(self.outcomes(), other.outcomes()).ravel()
+        weights = np.multiply.outer(self.probabilities, other.probabilities).ravel()
+        offset = int(outcomes.min())
+        probabilities = np.zeros(int(outcomes.max()) - offset + 1)
+        np.add.at(probabilities, outcomes - offset, weights)
+        return Distribution(probabilities, offset)
+
+    def __add__(self, other):
+        if isinstance(other, Distribution):
+            return Distribution(convolve(self.probabilities, other.probabilities), self.offset + other.offset)
+        return Distribution(self.probabilities, self.offset + as_integer(other))
+
+    __radd__ = __add__
+
+    def __neg__(self):
+        return Distribution(self.probabilities[::-1].copy(), -(self.offset + len(self) - 1))
+
+    def __pos__(self):
+        return self
+
+    def __sub__(self, other):
+        return self + (-other)
+
+    def __rsub__(self, other):
+        return (-self) + other
+
+    def __mul__(self, other):
+        if isinstance(other, Distribution):
+            if other.is_constant():
+                return self.scale(other.offset)
+            if self.is_constant():
+                return other.scale(self.offset)
+            return self.product(other)
+        return self.scale(as_integer(other))
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        if isinstance(other, Distribution):
+            if not other.is_constant():
+                raise ValueError('the fft backend can only divide by a constant')
+            other = other.offset
+        k = as_integer(other)
+        if k == 0:
+            raise ZeroDivisionError('division by zero')
+        outcomes = self.outcomes()[self.probabilities > 0]
+        if np.any(outcomes % k):
+            raise ValueError('the fft backend only supports integer outcomes')
+        if k < 0:
+            return (-self)/(-k)
+        shift = self.offset % k
+        probabilities = self.probabilities[(k - shift) % k::k]
+        return Distribution(probabilities, -(-self.offset//k))
+
+@lru_cache(maxsize=256)
+def repeated_die(count, sides, reroll=None):
+    """Returns the distribution of the sum of count dice with the given number of sides,
+    each rerolled once if it shows less than reroll.
+    """
+    if count == 0:
+        return Distribution.constant(0)
+    die = np.full(sides, 1/sides)
+    if reroll is not None:
+        rerolled = min(max(reroll - 1, 0), sides)
+        die[:rerolled] = 0
+        die += rerolled/sides**2
+    if count == 1:
+        probabilities = die
+    else:
+        n = count*(sides - 1) + 1
+        probabilities = clip(np.fft.irfft(np.fft.rfft(die, n)**count, n))
+    probabilities.flags.writeable = False
+    return Distribution(probabilities, count)
+
+class FFTBackend:
+    """Approximate distributions stored as float64 probability arrays.
+    """
+    name = 'fft'
+
+    def die(self, count, sides, reroll=None, keep_highest=None, keep_lowest=None):
+        if keep_highest is None and keep_lowest is None:
+            return repeated_die(count, sides, reroll)
+        return Distribution.from_die(icepool_die(count, sides, reroll, keep_highest, keep_lowest))
+
+    def number(self, value):
+        return Distribution.constant(value)
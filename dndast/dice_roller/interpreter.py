@@ -1,16 +1,20 @@
 from .nodes import *
+from .backends import get_backend
 
 class Interpreter:
+    def __init__(self, backend='icepool'):
+        self.backend = get_backend(backend)
+
     def evaluate(self, node):
         method_name = f'evaluate_{type(node).__name__}'
         method = getattr(self, method_name)
         return method(node)
     
     def evaluate_DieNode(self, node):
-        return node.value
+        return self.backend.die(node.count, node.sides, node.reroll, node.keep_highest, node.keep_lowest)
     
     def evaluate_NumberNode(self, node):
-        return node.value
+        return self.backend.number(node.number)
     
     def evaluate_AddNode(self, node):
         return self.evaluate(node.node_a) + self.evaluate(node.node_b)
@@ -2,7 +2,7 @@ import re
 from .tokens import *
 
 token_specification = [
-    ('DIE',         r'\d*d\d+'),      # die
+    ('DIE',         r'\d*d\d+(r<\d+)?(k[hl]\d+)?'), # die, optional reroll and keep
     ('NUMBER',      r'\d+(\.\d*)?'),  # Integer or decimal number
     ('OPERATOR',    r'[\*\+\-\/]'),   # Mathematical operator
     ('PARENTHESES', r'[\(\)]'),       # Parentheses
@@ -68,4 +68,33 @@ class Lexer:
             case '(':
                 return Token(TokenType.LPAREN)
             case ')':
-                return Token(TokenType.RPAREN)
\ No newline at end of file
+                return Token(TokenType.RPAREN)
+
+fast_regex = re.compile(r'\s*(?:(\d*d\d+(?:r<\d+)?(?:k[hl]\d+)?)|(\d+)(\.\d*)?|([\*\+\-\/\(\)])|(\S))')
+OPERATOR_TOKENS = {
+    '+': (TokenType.PLUS, None),
+    '-': (TokenType.MINUS, None),
+    '*': (TokenType.MULTIPLY, None),
+    '/': (TokenType.DIVIDE, None),
+    '(': (TokenType.LPAREN, None),
+    ')': (TokenType.RPAREN, None),
+}
+
+def tokenize(text):
+    """Fast-path alternative to Lexer that returns a list of (TokenType, value) tuples.
+
+    The whole string is scanned by one precompiled pattern that skips runs of
+    whitespace, operator tokens are shared rather than rebuilt, and whole
+    numbers are kept as int.
+    """
+    tokens = []
+    for die, integer, fraction, operator, mismatch in fast_regex.findall(text):
+        if operator:
+            tokens.append(OPERATOR_TOKENS[operator])
+        elif die:
+            tokens.append((TokenType.DIE, die))
+        elif integer:
+            tokens.append((TokenType.NUMBER, float(integer + fraction) if fraction else int(integer)))
+        else:
+            raise RuntimeError(f'{mismatch!r} unexpected')
+    return tokens
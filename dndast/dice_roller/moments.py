@@ -0,0 +1,106 @@
+"""Mean and variance backend for dice expressions.
+
+Every term of an expression is an independent random variable, so the mean and
+variance of sums, differences and products follow in closed form without
+building a distribution. Division is only supported by a constant.
+"""
+from functools import lru_cache
+from .backends import icepool_die
+
+class Moments:
+    """The mean and variance of a random variable.
+    """
+    __slots__ = ('mu', 'var')
+
+    def __init__(self, mean, variance=0.0):
+        self.mu = mean
+        self.var = variance
+
+    @classmethod
+    def of(cls, value):
+        """Converts a plain number into a constant.
+        """
+        if isinstance(value, Moments):
+            return value
+        return cls(value, 0.0)
+
+    @classmethod
+    def mixture(cls, weighted):
+        """Returns the moments of a mixture given (probability, Moments) pairs.
+        """
+        mean = sum(p*m.mu for p, m in weighted)
+        second = sum(p*(m.var + m.mu**2) for p, m in weighted)
+        return cls(mean, max(second - mean**2, 0.0))
+
+    def __repr__(self):
+        return f'Moments(mean={self.mu!r}, variance={self.var!r})'
+
+    def mean(self):
+        return self.mu
+
+    def variance(self):
+        return self.var
+
+    def sd(self):
+        return self.var**0.5
+
+    def repeat(self, n):
+        """Returns the moments of the sum of n independent copies.
+        """
+        return Moments(n*self.mu, n*self.var)
+
+    def __add__(self, other):
+        other = Moments.of(other)
+        return Moments(self.mu + other.mu, self.var + other.var)
+
+    __radd__ = __add__
+
+    def __neg__(self):
+        return Moments(-self.mu, self.var)
+
+    def __pos__(self):
+        return self
+
+    def __sub__(self, other):
+        return self + (-Moments.of(other))
+
+    def __rsub__(self, other):
+        return Moments.of(other) + (-self)
+
+    def __mul__(self, other):
+        other = Moments.of(other)
+        variance = self.var*other.var + self.var*other.mu**2 + other.var*self.mu**2
+        return Moments(self.mu*other.mu, variance)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        other = Moments.of(other)
+        if other.var:
+            raise ValueError('the moments backend can only divide by a constant')
+        return Moments(self.mu/other.mu, self.var/other.mu**2)
+
+@lru_cache(maxsize=256)
+def die_moments(count, sides, reroll=None, keep_highest=None, keep_lowest=None):
+    if keep_highest is not None or keep_lowest is not None:
+        die = icepool_die(count, sides, reroll, keep_highest, keep_lowest)
+        return Moments(float(die.mean()), float(die.variance()))
+    if reroll is None:
+        return Moments(count*(sides + 1)/2, count*(sides**2 - 1)/12)
+
+    rerolled = min(max(reroll - 1, 0), sides)
+    probabilities = [(rerolled/sides + (face >= reroll))/sides for face in range(1, sides + 1)]
+    mean = sum(p*face for face, p in enumerate(probabilities, 1))
+    second = sum(p*face**2 for face, p in enumerate(probabilities, 1))
+    return Moments(count*mean, count*(second - mean**2))
+
+class MomentsBackend:
+    """Propagates only the mean and variance of each term.
+    """
+    name = 'moments'
+
+    def die(self, count, sides, reroll=None, keep_highest=None, keep_lowest=None):
+        return die_moments(count, sides, reroll, keep_highest, keep_lowest)
+
+    def number(self, value):
+        return Moments(float(value), 0.0)
@@ -1,6 +1,7 @@
 from dataclasses import dataclass
 import re
 from icepool import d
+from .backends import icepool_die
 
 """@dataclass
 class NumberNode:
@@ -12,18 +13,44 @@ class NumberNode:
 class NumberNode:
     def __init__(self, value_str):
         self.value_str = value_str
-        self.value = float(self.value_str) * d(1)
+        self.number = float(self.value_str)
+        self._value = None
+
+    @property
+    def value(self):
+        if self._value is None:
+            self._value = self.number * d(1)
+        return self._value
 
     def __repr__(self):
         return f'{self.value_str}'
     
 class DieNode:
+    """A pool of identical dice, optionally rerolled and with only some of them kept.
+        '4d6kh3': roll 4d6 and keep the highest 3.
+        '2d20kl1': roll 2d20 and keep the lowest 1.
+        '2d6r<3': roll 2d6, rerolling each die once if it shows less than 3.
+    """
     def __init__(self, value_str):
         self.value_str = value_str
-        m = re.match(r'^(?P<count>\d*)?[Dd](?P<sides>\d+)$', self.value_str)
-        die_count = int(m.group('count')) if m.group('count') else 1
-        die_sides = int(m.group('sides'))
-        self.value = die_count @ d(die_sides)
+        m = re.match(r'^(?P<count>\d*)?[Dd](?P<sides>\d+)(r<(?P<reroll>\d+))?(k(?P<keep>[hl])(?P<keep_count>\d+))?$', self.value_str)
+        self.count = int(m.group('count')) if m.group('count') else 1
+        self.sides = int(m.group('sides'))
+        self.reroll = int(m.group('reroll')) if m.group('reroll') else None
+        if self.reroll is not None and self.reroll <= 1:
+            # no face is below 1, so nothing is ever rerolled
+            self.reroll = None
+        self.keep_highest = int(m.group('keep_count')) if m.group('keep') == 'h' else None
+        self.keep_lowest = int(m.group('keep_count')) if m.group('keep') == 'l' else None
+        if max(self.keep_highest or 0, self.keep_lowest or 0) > self.count:
+            raise ValueError(f'{self.value_str!r} keeps more dice than it rolls')
+        self._value = None
+
+    @property
+    def value(self):
+        if self._value is None:
+            self._value = icepool_die(self.count, self.sides, self.reroll, self.keep_highest, self.keep_lowest)
+        return self._value
     
     def __repr__(self):
         return f'{self.value_str}'
@@ -72,4 +99,4 @@ class MinusNode:
     node: any
 
     def __repr__(self):
-        return f'(-{self.node})'
\ No newline at end of file
+        return f'(-{self.node})'
@@ -0,0 +1,119 @@
+from collections import defaultdict
+from .nodes import *
+
+class Optimizer:
+    """Rewrites a dice expression tree into an equivalent one that is cheaper to evaluate.
+
+    Arithmetic on constants is folded into a single NumberNode, dice with the
+    same number of sides in a sum are pooled into one DieNode (1d6 + 1d6 -> 2d6)
+    and the constant offset of a sum is moved to the end, so each convolution
+    happens once on the largest possible pool. Dice that are only partly kept are
+    left as they are.
+    """
+    def optimize(self, node):
+        if node is None:
+            return None
+        method_name = f'optimize_{type(node).__name__}'
+        method = getattr(self, method_name, self.optimize_leaf)
+        return method(node)
+
+    def optimize_leaf(self, node):
+        return node
+
+    def optimize_AddNode(self, node):
+        return self.optimize_sum(node)
+
+    def optimize_SubtractNode(self, node):
+        return self.optimize_sum(node)
+
+    def optimize_PlusNode(self, node):
+        return self.optimize_sum(node)
+
+    def optimize_MinusNode(self, node):
+        return self.optimize_sum(node)
+
+    def optimize_MultiplyNode(self, node):
+        factors = []
+        self.collect_factors(node, factors)
+        constant = None
+        others = []
+        for factor in factors:
+            if type(factor) is NumberNode:
+                constant = factor.number if constant is None else constant*factor.number
+            else:
+                others.append(factor)
+
+        result = NumberNode(constant) if constant is not None else None
+        for factor in others:
+            result = factor if result is None else MultiplyNode(result, factor)
+        return result
+
+    def optimize_DivideNode(self, node):
+        node_a = self.optimize(node.node_a)
+        node_b = self.optimize(node.node_b)
+        if type(node_a) is NumberNode and type(node_b) is NumberNode and node_b.number != 0:
+            return NumberNode(node_a.number/node_b.number)
+        return DivideNode(node_a, node_b)
+
+    def collect_factors(self, node, factors):
+        if type(node) is MultiplyNode:
+            self.collect_factors(node.node_a, factors)
+            self.collect_factors(node.node_b, factors)
+        else:
+            factors.append(self.optimize(node))
+
+    def collect_terms(self, node, sign, terms):
+        """Flattens nested sums into a list of (sign, node) terms.
+        """
+        match type(node).__name__:
+            case 'AddNode':
+                self.collect_terms(node.node_a, sign, terms)
+                self.collect_terms(node.node_b, sign, terms)
+            case 'SubtractNode':
+                self.collect_terms(node.node_a, sign, terms)
+                self.collect_terms(node.node_b, -sign, terms)
+            case 'PlusNode':
+                self.collect_terms(node.node, sign, terms)
+            case 'MinusNode':
+                self.collect_terms(node.node, -sign, terms)
+            case _:
+                node = self.optimize(node)
+                if type(node) in (AddNode, SubtractNode, PlusNode, MinusNode):
+                    self.collect_terms(node, sign, terms)
+                else:
+                    terms.append((sign, node))
+
+    def optimize_sum(self, node):
+        terms = []
+        self.collect_terms(node, 1, terms)
+
+        constant = None
+        pools = defaultdict(int)
+        others = []
+        for sign, term in terms:
+            if type(term) is NumberNode:
+                constant = (constant or 0) + sign*term.number
+            elif type(term) is DieNode and term.keep_highest is None and term.keep_lowest is None:
+                pools[(sign, term.sides, term.reroll)] += term.count
+            else:
+                others.append((sign, term))
+
+        ordered = [(sign, DieNode(f'{count}d{sides}' + (f'r<{reroll}' if reroll else ''))) for (sign, sides, reroll), count in pools.items()] + others
+        ordered.sort(key=lambda term: -term[0])
+
+        result = None
+        for sign, term in ordered:
+            if result is None:
+                result = term if sign > 0 else MinusNode(term)
+            elif sign > 0:
+                result = AddNode(result, term)
+            else:
+                result = SubtractNode(result, term)
+
+        if constant is None:
+            return result
+        if result is None:
+            return NumberNode(constant)
+        if constant < 0:
+            return SubtractNode(result, NumberNode(-constant))
+        return AddNode(result, NumberNode(constant))
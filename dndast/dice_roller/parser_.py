@@ -2,6 +2,9 @@ from .tokens import *
 from .nodes import *
 
 class Parser:
+    """Builds a dice expression tree from (TokenType, value) pairs, as produced by
+    either Lexer.generate_tokens() or tokenize().
+    """
     def __init__(self, tokens):
         self.tokens = iter(tokens)
         self.advance()
@@ -11,17 +14,17 @@ class Parser:
 
     def advance(self):
         try:
-            self.current_token = next(self.tokens)
+            self.current_type, self.current_value = next(self.tokens)
         except StopIteration:
-            self.current_token = None
+            self.current_type = self.current_value = None
 
     def parse(self):
-        if self.current_token == None:
+        if self.current_type == None:
             return None
         
         result = self.expr()
 
-        if self.current_token != None:
+        if self.current_type != None:
             self.raise_error()
 
         return result
@@ -30,11 +33,11 @@ class Parser:
     def expr(self):
         result = self.term()
 
-        while self.current_token != None and self.current_token.type in (TokenType.PLUS, TokenType.MINUS):
-            if self.current_token.type == TokenType.PLUS:
+        while self.current_type in (TokenType.PLUS, TokenType.MINUS):
+            if self.current_type == TokenType.PLUS:
                 self.advance()
                 result = AddNode(result, self.term())
-            elif self.current_token.type == TokenType.MINUS:
+            elif self.current_type == TokenType.MINUS:
                 self.advance()
                 result = SubtractNode(result, self.term())
 
@@ -42,30 +45,30 @@ class Parser:
     
 
     def factor(self):
-        token = self.current_token
+        token_type, token_value = self.current_type, self.current_value
         
-        if token.type == TokenType.LPAREN:
+        if token_type == TokenType.LPAREN:
             self.advance()
             result = self.expr()
 
-            if self.current_token.type != TokenType.RPAREN:
+            if self.current_type != TokenType.RPAREN:
                 self.raise_error()
 
             self.advance()
             return result
         
-        if token.type == TokenType.NUMBER:
+        if token_type == TokenType.NUMBER:
             self.advance()
-            return NumberNode(token.value)
-        elif token.type == TokenType.PLUS:
+            return NumberNode(token_value)
+        elif token_type == TokenType.PLUS:
             self.advance()
             return PlusNode(self.factor())
-        elif token.type == TokenType.MINUS:
+        elif token_type == TokenType.MINUS:
             self.advance()
             return MinusNode(self.factor())
-        elif token.type == TokenType.DIE:
+        elif token_type == TokenType.DIE:
             self.advance()
-            return DieNode(token.value)
+            return DieNode(token_value)
         
         self.raise_error()
     
@@ -73,11 +76,11 @@ class Parser:
     def term(self):
         result = self.factor()
 
-        while self.current_token != None and self.current_token.type in (TokenType.MULTIPLY, TokenType.DIVIDE):
-            if self.current_token.type == TokenType.MULTIPLY:
+        while self.current_type in (TokenType.MULTIPLY, TokenType.DIVIDE):
+            if self.current_type == TokenType.MULTIPLY:
                 self.advance()
                 result = MultiplyNode(result, self.factor())
-            elif self.current_token.type == TokenType.DIVIDE:
+            elif self.current_type == TokenType.DIVIDE:
                 self.advance()
                 result = DivideNode(result, self.factor())
 
@@ -0,0 +1,54 @@
+import numpy as np
+from .nodes import *
+
+class Sampler:
+    """Draws batches of rolls of a dice expression tree with NumPy.
+
+    Every die term is drawn with a single Generator.integers() call covering all
+    n rolls, and the arithmetic is applied to whole arrays at once.
+        rng: (int, Generator) A seed or numpy Generator; None draws fresh entropy.
+    """
+    def __init__(self, rng=None):
+        self.rng = np.random.default_rng(rng)
+
+    def sample(self, node, n):
+        method_name = f'sample_{type(node).__name__}'
+        method = getattr(self, method_name)
+        return method(node, n)
+
+    def sample_DieNode(self, node, n):
+        dtype = np.int16 if node.sides < 2**15 else np.int64
+        rolls = self.rng.integers(1, node.sides, size=(n, node.count), endpoint=True, dtype=dtype)
+        if node.reroll is not None:
+            low = rolls < node.reroll
+            rolls[low] = self.rng.integers(1, node.sides, size=low.sum(), endpoint=True, dtype=dtype)
+        if node.keep_highest is not None:
+            rolls = np.sort(rolls, axis=1)[:, node.count - node.keep_highest:]
+        elif node.keep_lowest is not None:
+            rolls = np.sort(rolls, axis=1)[:, :node.keep_lowest]
+        return rolls.sum(axis=1, dtype=np.int64)
+
+    def sample_NumberNode(self, node, n):
+        return np.full(n, node.number)
+
+    def sample_AddNode(self, node, n):
+        return self.sample(node.node_a, n) + self.sample(node.node_b, n)
+
+    def sample_SubtractNode(self, node, n):
+        return self.sample(node.node_a, n) - self.sample(node.node_b, n)
+
+    def sample_MultiplyNode(self, node, n):
+        return self.sample(node.node_a, n) * self.sample(node.node_b, n)
+
+    def sample_DivideNode(self, node, n):
+        numerator = self.sample(node.node_a, n)
+        denominator = self.sample(node.node_b, n)
+        if np.any(denominator == 0):
+            raise Exception('Runtime math error')
+        return numerator / denominator
+
+    def sample_PlusNode(self, node, n):
+        return self.sample(node.node, n)
+
+    def sample_MinusNode(self, node, n):
+        return -self.sample(node.node, n)
@@ -1,5 +1,5 @@
 from enum import Enum
-from dataclasses import dataclass
+from typing import NamedTuple
 
 class TokenType(Enum):
     NUMBER      = 0
@@ -11,8 +11,7 @@ class TokenType(Enum):
     RPAREN      = 6
     DIE         = 7
 
-@dataclass
-class Token:
+class Token(NamedTuple):
     type: TokenType
     value: any = None
 
@@ -0,0 +1,118 @@
+"""
+Hash-consing of node trees.
+
+Every node gets a stable structural fingerprint: a blake2b digest of its type
+and field values, in which child nodes are represented by their own
+fingerprints. The digest does not depend on the Python process, so it can be
+stored or compared across runs. An Interner uses it to share one instance
+between all structurally identical subtrees.
+"""
+from dataclasses import fields
+from hashlib import blake2b
+from .nodes import *
+
+DIGEST_SIZE = 16
+
+def digest_of(encoding):
+    return blake2b(encoding.encode(), digest_size=DIGEST_SIZE).hexdigest()
+
+
+def encode_scalar(value):
+    return f'{type(value).__name__}:{value!r}'
+
+
+def encode_frozen(value):
+    """Encodes a value returned by analysis.freeze, with the members of frozensets
+    sorted so that the encoding is the same in every process.
+    """
+    if type(value) is tuple:
+        return f'({",".join(encode_frozen(v) for v in value)})'
+    if type(value) is frozenset:
+        return f'{{{",".join(sorted(encode_frozen(v) for v in value))}}}'
+    return encode_scalar(value)
+
+
+def fingerprint(node):
+    """Returns the stable structural fingerprint of a node tree as a hex string.
+    """
+    return Interner().fingerprint(node)
+
+
+class Interner:
+    """Shares one instance between structurally identical subtrees.
+
+    Interned nodes may be shared by many trees. Nodes are frozen, but the lists
+    and dicts they hold are not, and must be treated as read-only.
+        nodes: (dict) Maps fingerprints to their shared node.
+        digests: (dict) Maps the id of each shared node to its fingerprint.
+    """
+    def __init__(self):
+        self.nodes = {}
+        self.digests = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __contains__(self, node):
+        return self.fingerprint(node) in self.nodes
+
+    def info(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self.nodes)}
+
+    def clear(self):
+        self.nodes.clear()
+        self.digests.clear()
+        self.hits = self.misses = 0
+
+    def intern(self, node):
+        """Returns the shared instance of node, with every subtree interned as well.
+        Dicts in the form used by dict_to_node are converted first.
+        """
+        if type(node) is dict:
+            node = dict_to_node(node)
+        return self.intern_value(node)[0]
+
+    def fingerprint(self, node):
+        """Returns the fingerprint of node, looked up directly if it was interned here.
+        """
+        fp = self.digests.get(id(node))
+        if fp is not None and self.nodes.get(fp) is node:
+            return fp
+        return self.intern_value(node, share=False)[1]
+
+    def intern_value(self, value, share=True):
+        """Returns (value, encoding), where value has every node inside it interned
+        and encoding identifies its structure. The encoding of a node is its fingerprint.
+        """
+        if type(value) in NODE_TYPES:
+            fp = self.digests.get(id(value))
+            if fp is not None and self.nodes.get(fp) is value:
+                return value, fp
+
+            kwargs = {}
+            parts = []
+            for f in fields(value):
+                kwargs[f.name], encoding = self.intern_value(getattr(value, f.name), share)
+                parts.append(f'{f.name}={encoding}')
+            fp = digest_of(f'{type(value).__name__}({",".join(parts)})')
+            if not share:
+                return value, fp
+
+            shared = self.nodes.get(fp)
+            if shared is not None:
+                self.hits += 1
+                return shared, fp
+            self.misses += 1
+            shared = type(value)(**kwargs)
+            self.nodes[fp] = shared
+            self.digests[id(shared)] = fp
+            return shared, fp
+        if type(value) is list:
+            items = [self.intern_value(v, share) for v in value]
+            return [v for v, _ in items], f'[{",".join(e for _, e in items)}]'
+        if type(value) is dict:
+            items = [(k, self.intern_value(v, share)) for k, v in value.items()]
+            return {k: v for k, (v, _) in items}, f'{{{",".join(f"{encode_scalar(k)}:{e}" for k, (_, e) in items)}}}'
+        return value, encode_scalar(value)
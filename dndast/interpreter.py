@@ -1,21 +1,390 @@
 from .nodes import *
-from .dice_roller import Dice_Roller
+from .analysis import accessor, freeze, references, set_reference, structure_key, targeting_nodes
+from .dice_roller import Dice_Roller, LRUCache
+from .interning import digest_of, encode_frozen, fingerprint
 from icepool import map, d, Die
+import itertools
 import math
+from functools import lru_cache
+
+MEMO_NODES = {
+    'AndNode',
+    'AttackNode',
+    'AttackRollNode',
+    'SaveNode',
+    'SaveRollNode',
+    'SelectionNode',
+}
+MISSING = object()
+
+def feet(s):
+    return int(s.split(' ')[0])
+
+def targeting_mode(node):
+    """Returns 'melee' or 'ranged' depending on the range of a TargetingNode.
+    """
+    return 'melee' if feet(node.range) < 10 else 'ranged'
+
+def target_reads(node):
+    """Returns the accessors of the reference paths read in a subtree and the targeting modes it uses.
+    """
+    accessors = [accessor(path) for path in sorted(references(node))]
+    modes = sorted({targeting_mode(n) for n in targeting_nodes(node)})
+    return accessors, modes
+
+def group_targets(targets):
+    """Groups equal targets together, returning [target, count] pairs in the order first seen.
+    """
+    groups = []
+    for target in targets:
+        for group in groups:
+            if group[0] == target:
+                group[1] += 1
+                break
+        else:
+            groups.append([target, 1])
+    return groups
+
+def repeated_sum(value, n):
+    """Sums n independent copies of value using exponentiation by squaring.
+    """
+    result = None
+    while n:
+        if n & 1:
+            result = value if result is None else result + value
+        n >>= 1
+        if n:
+            value = value + value
+    return 0 if result is None else result
+
+@lru_cache(maxsize=1024)
+def binomial_die(n, failure, success):
+    """Returns the number of failures among n independent saves as a Die, with
+    the same weights as summing n copies of Die({1: failure, 0: success}).
+    """
+    return Die({k: math.comb(n, k)*failure**k*success**(n - k) for k in range(n + 1) if (failure or k == 0) and (success or k == n)})
+
+def save_damage_mixture(targets, failures, failure_damage, success_multiplier):
+    """Returns the total damage of a save effect given the distribution of the
+    number of failed saves, mixing the damage for each failure count directly.
+    """
+    if not isinstance(failure_damage, Die):
+        failure_damage = Die([failure_damage])
+    damage = [(x, q, math.floor(success_multiplier*x)) for x, q in failure_damage.items()]
+    counts = {}
+    for k, p in failures.items():
+        for x, q, partial in damage:
+            total = k*x + (targets - k)*partial
+            counts[total] = counts.get(total, 0) + p*q
+    return Die(counts)
+
+@lru_cache(maxsize=4096)
+def attack_outcome_table(margin, critical_hit_range, critical_miss_range):
+    """Returns the attack roll outcomes for a given attack_bonus - armor_class margin.
+    """
+    counts = {}
+    for d20 in range(1, 21):
+        if d20 in critical_hit_range:
+            outcome = 'critical hit'
+        elif d20 in critical_miss_range:
+            outcome = 'critical miss'
+        elif d20 + margin >= 0:
+            outcome = 'hit'
+        else:
+            outcome = 'miss'
+        counts[outcome] = counts.get(outcome, 0) + 1
+    return Die(counts)
+
+@lru_cache(maxsize=256)
+def save_outcome_table(margin):
+    """Returns the saving throw outcomes for a given save_bonus - save_dc margin.
+    """
+    successes = min(max(21 + margin, 0), 20)
+    counts = {'failure': 20 - successes, 'success': successes}
+    return Die({k: v for k, v in counts.items() if v})
+
+def is_int_range(value):
+    return type(value) is list and all(type(v) is int for v in value)
+
+class PackedDie:
+    """The (outcome, quantity) pairs of a Die, which icepool cannot pickle, for
+    passing results back from worker processes.
+    """
+    __slots__ = ('items',)
+
+    def __init__(self, items):
+        self.items = items
+
+def pack_result(result):
+    """Replaces the Dice in a result, including those nested in lists, tuples and dicts, by PackedDie.
+    """
+    if isinstance(result, Die):
+        return PackedDie(list(result.items()))
+    if type(result) in (list, tuple):
+        return type(result)(pack_result(v) for v in result)
+    if type(result) is dict:
+        return {k: pack_result(v) for k, v in result.items()}
+    return result
+
+def unpack_result(result):
+    """Reverses pack_result.
+    """
+    if type(result) is PackedDie:
+        return Die(dict(result.items))
+    if type(result) in (list, tuple):
+        return type(result)(unpack_result(v) for v in result)
+    if type(result) is dict:
+        return {k: unpack_result(v) for k, v in result.items()}
+    return result
+
+def evaluate_with_targets(interpreter_type, targets, node, kwargs, memo=False, memo_size=1024, profiler_type=None):
+    """Evaluates node with a new interpreter, so that it can run in a worker process.
+    Returns the packed result and the profiler used, or None if profiler_type is None.
+    """
+    profiler = profiler_type() if profiler_type is not None else None
+    interpreter = interpreter_type(targets, memo=memo, memo_size=memo_size, profiler=profiler)
+    return pack_result(interpreter.evaluate(node, **kwargs)), profiler
 
 class Interpreter:
-    def __init__(self, targets={}):
+    """Evaluates node trees into icepool distributions.
+        targets: (dict) Describes the melee and ranged targets available.
+        memo: (bool) Reuse the results of structurally identical subtrees that read the same target values.
+        memo_size: (int) The maximum number of memoized results kept.
+        profiler: (Profiler) Called with enter(node) and exit(result) around every node evaluated.
+
+    VERSION identifies the semantics of evaluation. Bump it whenever a change
+    alters the results of existing trees or the keys built by result_key, so that
+    persistent caches stop using their old entries.
+    """
+    VERSION = 2
+
+    def __init__(self, targets={}, memo=False, memo_size=1024, profiler=None):
         self.targets = targets
+        self.memo_size = memo_size
+        self.memo = LRUCache(maxsize=memo_size) if memo else None
+        self.analysis = LRUCache(maxsize=memo_size) if memo else None
+        self.profiler = profiler
 
     def evaluate(self, node, **kwargs):
         if type(node) in [str,int,float,list]:
             return node
         if node == None: return None
+        if self.profiler is not None:
+            self.profiler.enter(node)
+            result = None
+            try:
+                result = self.dispatch(node, **kwargs)
+                return result
+            finally:
+                self.profiler.exit(result)
+        return self.dispatch(node, **kwargs)
+
+    def dispatch(self, node, **kwargs):
         method_name = f'evaluate_{type(node).__name__}'
         method = getattr(self, method_name)
+        if self.memo is not None and type(node).__name__ in MEMO_NODES:
+            key = self.memo_key(node, kwargs)
+            result = self.memo.get(key, MISSING)
+            if result is MISSING:
+                result = method(node, **kwargs)
+                self.memo.put(key, result)
+            return result
         result = method(node, **kwargs)
         return result
-    
+
+    def analyze(self, node):
+        """Returns the structure key, reference accessors and targeting modes of a subtree.
+        """
+        entry = self.analysis.get(id(node))
+        if entry is None or entry[0] is not node:
+            entry = (node, structure_key(node), *target_reads(node))
+            self.analysis.put(id(node), entry)
+        return entry[1:]
+
+    def target_context(self, accessors, modes, kwargs):
+        """Returns the frozen values read through accessors from kwargs and from the
+        targets of each targeting mode, along with the settings of those modes.
+        """
+        context = [a.get(kwargs) for a in accessors]
+        for mr in modes:
+            target = {'target': self.targets.get(f'{mr}_target')}
+            context.append(self.targets.get(f'{mr}_maxtargets'))
+            context.append(self.targets.get(f'{mr}_targetarea'))
+            context.extend(a.get(target) for a in accessors)
+        return freeze(context)
+
+    def memo_key(self, node, kwargs):
+        """Builds a key from the structure of node and the target values it can read.
+        """
+        structure, accessors, modes = self.analyze(node)
+        return (structure, self.target_context(accessors, modes, kwargs))
+
+    def result_key(self, node, **kwargs):
+        """Returns a hex digest identifying the result of evaluating node with kwargs
+        and the current targets, which is stable across processes. It combines the
+        fingerprint of node with a digest of the target values and settings it reads.
+        """
+        context = digest_of(encode_frozen(self.target_context(*target_reads(node), kwargs)))
+        return digest_of(f'{type(self).__name__}:{fingerprint(node)}:{context}')
+
+    def memo_info(self):
+        info = self.memo.info()
+        lookups = info['hits'] + info['misses']
+        info['hit_rate'] = info['hits']/lookups if lookups else 0.0
+        return info
+
+    def memo_clear(self):
+        self.memo.clear()
+        self.analysis.clear()
+
+    def update_targets(self, changes):
+        """Applies changes to the targets and returns the new targets dict.
+            changes: (dict) Maps paths in the targets dict, e.g. 'melee_target.armor_class', to their new values.
+
+        The targets dict passed in is copied, not modified. Memoization is turned on
+        if it was off, so that the next evaluation only recomputes the subtrees whose
+        references or targets changed and reuses the results of everything else.
+        """
+        if self.memo is None:
+            self.memo = LRUCache(maxsize=self.memo_size)
+            self.analysis = LRUCache(maxsize=self.memo_size)
+        targets = self.targets
+        for path, value in changes.items():
+            targets = set_reference(targets, path, value)
+        self.targets = targets
+        return targets
+
+    def group_profiles(self, node, profiles, **kwargs):
+        """Groups targets dicts that node would evaluate identically, i.e. that agree
+        on every stat and target setting node reads.
+
+        Returns a list of [profile, indices] pairs, where profile is the first
+        targets dict of its group and indices are the positions of every member.
+        """
+        targets, analysis = self.targets, self.analysis
+        if self.analysis is None:
+            self.analysis = LRUCache(maxsize=None)
+
+        groups = {}
+        try:
+            for i, profile in enumerate(profiles):
+                self.targets = profile
+                key = self.memo_key(node, kwargs)
+                groups.setdefault(key, [profile, []])[1].append(i)
+        finally:
+            self.targets, self.analysis = targets, analysis
+        return list(groups.values())
+
+    def evaluate_batch(self, node, profiles, executor=None, **kwargs):
+        """Evaluates node against each of a list of targets dicts, e.g. a set of monster stat blocks.
+            profiles: (list) The targets dicts to evaluate against.
+            executor: (Executor) Optional concurrent.futures executor to evaluate groups in parallel.
+
+        Returns the results in the same order as profiles. Profiles that agree on
+        every stat node reads are evaluated once. Without an executor, subtrees
+        that do not depend on the differences between groups are also shared.
+        With one, each group is evaluated by a new interpreter with the same memo
+        settings, and a new profiler of the same type, which must have a merge
+        method, whose measurements are merged into this one.
+        """
+        groups = self.group_profiles(node, profiles, **kwargs)
+        if executor is not None:
+            memo = self.memo is not None
+            profiler_type = type(self.profiler) if self.profiler is not None else None
+            futures = [
+                executor.submit(evaluate_with_targets, type(self), profile, node, kwargs, memo, self.memo_size, profiler_type)
+                for profile, _ in groups
+            ]
+            values = []
+            for future in futures:
+                value, profiler = future.result()
+                if profiler is not None:
+                    self.profiler.merge(profiler)
+                values.append(unpack_result(value))
+        else:
+            targets, memo, analysis = self.targets, self.memo, self.analysis
+            if self.memo is None:
+                self.memo = LRUCache(maxsize=None)
+                self.analysis = LRUCache(maxsize=None)
+            try:
+                values = []
+                for profile, _ in groups:
+                    self.targets = profile
+                    values.append(self.evaluate(node, **kwargs))
+            finally:
+                self.targets, self.memo, self.analysis = targets, memo, analysis
+
+        results = [None]*len(profiles)
+        for (_, indices), value in zip(groups, values):
+            for i in indices:
+                results[i] = value
+        return results
+
+    def sweep(self, node, grid, **kwargs):
+        """Evaluates node at every point of a grid of target stats.
+            grid: (dict) Maps paths to the values to sweep. A path is either a reference
+                path read by node, e.g. 'target.armor_class', or a path in the targets
+                dict as accepted by update_targets, e.g. 'melee_target.armor_class'.
+
+        Returns a list of (point, result) pairs, where point maps each path to its
+        value. Swept 'target' paths are applied to both the melee and ranged targets
+        and to any target passed in kwargs. Subtrees that do not read a swept path
+        are evaluated once and shared by every point. Raises ValueError for paths
+        that cannot be applied or that node never reads.
+        """
+        for path in grid:
+            self.check_sweep_path(node, path, kwargs)
+
+        targets, memo, analysis = self.targets, self.memo, self.analysis
+        if self.memo is None:
+            self.memo = LRUCache(maxsize=None)
+            self.analysis = LRUCache(maxsize=None)
+
+        results = []
+        try:
+            for values in itertools.product(*grid.values()):
+                point = dict(zip(grid, values))
+                point_targets, point_kwargs = targets, kwargs
+                for path, value in point.items():
+                    root = path.split('.')[0]
+                    if root == 'target':
+                        for mr in ['melee', 'ranged']:
+                            if f'{mr}_target' in point_targets:
+                                target = set_reference({'target': point_targets[f'{mr}_target']}, path, value)
+                                point_targets = {**point_targets, f'{mr}_target': target['target']}
+                    elif root in targets:
+                        point_targets = set_reference(point_targets, path, value)
+                    if root in point_kwargs:
+                        point_kwargs = set_reference(point_kwargs, path, value)
+                self.targets = point_targets
+                results.append((point, self.evaluate(node, **point_kwargs)))
+        finally:
+            self.targets, self.memo, self.analysis = targets, memo, analysis
+        return results
+
+    def check_sweep_path(self, node, path, kwargs):
+        """Raises ValueError unless sweeping path can change the result of node.
+        """
+        root, _, field = path.partition('.')
+        modes = {targeting_mode(n) for n in targeting_nodes(node)}
+        if root in [f'{mr}_target' for mr in ['melee', 'ranged']]:
+            if root.split('_')[0] not in modes:
+                raise ValueError(f'{path!r} is not read by the tree')
+            reference = f'target.{field}' if field else 'target'
+        elif root in self.targets and root not in kwargs:
+            if root not in [f'{mr}_{setting}' for mr in modes for setting in ['maxtargets', 'targetarea']]:
+                raise ValueError(f'{path!r} is not read by the tree')
+            return
+        elif root == 'target' or root in kwargs:
+            reference = path
+        else:
+            raise ValueError(f'cannot sweep {path!r}: {root!r} is not a target, a targets setting or a keyword argument')
+
+        for read in references(node):
+            if read == reference or read.startswith(f'{reference}.') or reference.startswith(f'{read}.'):
+                return
+        raise ValueError(f'{path!r} is not read by the tree')
+
     def evaluate_AndNode(self, node, **kwargs):
         return sum([self.evaluate(v, **kwargs) for v in node.values])
     
@@ -28,11 +397,12 @@ class Interpreter:
         if type(targets) is not list:
             targets = [targets]
 
+        # identical targets share one evaluation, summed by repeated squaring
         value = 0
-        for target in targets:
+        for target, count in group_targets(targets):
             kwargs['target'] = target
             outcomes = self.evaluate(node.attack_roll, **kwargs)
-            value += map(apply_results, outcomes, results)
+            value += repeated_sum(map(apply_results, outcomes, results), count)
         
         return value
 
@@ -47,11 +417,14 @@ class Interpreter:
             else:
                 return 'miss'
         
-        outcomes = map(attack_outcomes, d(20), 
-                       self.evaluate(node.critical_hit_range, **kwargs),
-                       self.evaluate(node.critical_miss_range, **kwargs),
-                       self.evaluate(node.attack_bonus, **kwargs),
-                       self.evaluate(node.armor_class, **kwargs))
+        chr = self.evaluate(node.critical_hit_range, **kwargs)
+        cmr = self.evaluate(node.critical_miss_range, **kwargs)
+        ab = self.evaluate(node.attack_bonus, **kwargs)
+        ac = self.evaluate(node.armor_class, **kwargs)
+        if type(ab) is int and type(ac) is int and is_int_range(chr) and is_int_range(cmr):
+            return attack_outcome_table(ab - ac, tuple(chr), tuple(cmr))
+
+        outcomes = map(attack_outcomes, d(20), chr, cmr, ab, ac)
         return outcomes
     
     def evaluate_DamageNode(self, node, **kwargs):
@@ -61,15 +434,11 @@ class Interpreter:
         return self.evaluate_RollNode(node)
     
     def evaluate_ReferenceNode(self, node, **kwargs):
-        value_list = node.value.split('.')
-        target = kwargs.get(value_list[0], None)
-        if not target: return None
-        if len(value_list) == 1: return target
-        return target.get(value_list[1], None)
+        return accessor(node.value).get(kwargs)
     
     def evaluate_RollNode(self, node):
         if type(node.value) is str:
-            return Dice_Roller(node.value).value
+            return Dice_Roller.cached(node.value).value
         elif type(node.value) is dict:
             return Die(node.value)
     
@@ -79,23 +448,19 @@ class Interpreter:
         if type(targets) is not list:
             targets = [targets]
         
-        SW = {'failure': 1, 'success': 0}
-        failures = 0
-        for target in targets:
+        # identical targets fail a binomial number of times
+        failures = Die([0])
+        for i, (target, count) in enumerate(group_targets(targets)):
             kwargs['target'] = target
-            outcome = self.evaluate(node.save_roll, **kwargs)
-            failures += Die({SW[k]: v for k, v in outcome.items()})
+            outcome = dict(self.evaluate(node.save_roll, **kwargs).items())
+            group = binomial_die(count, outcome.get('failure', 0), outcome.get('success', 0))
+            failures = group if i == 0 else failures + group
         
         # apply damage
-        def save_damage(targets, failures, failure_damage, success_multiplier):
-            """Used to convert the distribution of saving throw failures for a given number of targets into the total damage.
-            """
-            return failures*failure_damage + (targets - failures)*math.floor(success_multiplier*failure_damage)
-        
         failure_damage = self.evaluate(node.results['failure'])
         success_multiplier = node.results['success']
 
-        value = map(save_damage, len(targets), failures, failure_damage, success_multiplier)
+        value = save_damage_mixture(len(targets), failures, failure_damage, success_multiplier)
         return value
 
     def evaluate_SaveRollNode(self, node, **kwargs):
@@ -106,9 +471,12 @@ class Interpreter:
                 return 'failure'
         
         # evaluate outcomes
-        outcomes = map(save_outcomes, d(20), 
-                       self.evaluate(node.save_dc, **kwargs),
-                       self.evaluate(node.save_bonus, **kwargs))
+        dc = self.evaluate(node.save_dc, **kwargs)
+        sb = self.evaluate(node.save_bonus, **kwargs)
+        if type(dc) is int and type(sb) is int:
+            return save_outcome_table(sb - dc)
+
+        outcomes = map(save_outcomes, d(20), dc, sb)
         return outcomes
     
     def evaluate_SelectionNode(self, node, **kwargs):
@@ -120,9 +488,6 @@ class Interpreter:
         return map(apply_results, outcomes, results)
     
     def evaluate_TargetingNode(self, node, **kwargs):
-        def feet(s):
-            return int(s.split(' ')[0])
-        
         def calc_area(area):
             match area['shape']:
                 case 'cone':
@@ -140,8 +505,7 @@ class Interpreter:
                 case _:
                     return None # should be an error ... probably
             
-        r = feet(node.range)
-        mr = 'melee' if r < 10 else 'ranged'
+        mr = targeting_mode(node)
 
         # determine the number of melee and ranged targets
         if not node.area:
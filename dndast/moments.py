@@ -0,0 +1,81 @@
+"""
+An evaluator that propagates only the mean and variance of each node, for
+ranking large numbers of actions when full distributions are not needed.
+"""
+from .nodes import *
+from .interpreter import Interpreter, group_targets
+from .dice_roller import Dice_Roller
+from .dice_roller.moments import Moments
+import math
+
+def outcome_probabilities(outcomes):
+    """Returns {outcome: probability} for a categorical Die, such as an attack or save roll.
+    """
+    denominator = outcomes.denominator()
+    return {k: q/denominator for k, q in outcomes.items()}
+
+
+class MomentInterpreter(Interpreter):
+    """Evaluates node trees into Moments, i.e. the mean and variance of the result.
+
+    Uses linearity of expectation throughout: AndNode adds, SelectionNode and
+    AttackNode are probability-weighted mixtures of their results and SaveNode
+    uses the binomial moments of the number of failed saves. Attack and save
+    rolls are still evaluated exactly, since they only have a handful of outcomes.
+
+    The only approximation is in SaveNode when the failure damage is rolled: the
+    damage taken on a success, floor(success * damage), is treated as
+    success * damage. This overestimates the mean by less than one point per
+    successful save.
+    """
+    def evaluate_AndNode(self, node, **kwargs):
+        return sum([Moments.of(self.evaluate(v, **kwargs)) for v in node.values], Moments(0.0))
+
+    def evaluate_AttackNode(self, node, **kwargs):
+        results = {k: Moments.of(self.evaluate(v)) for k, v in node.results.items()}
+        targets = self.evaluate(node.targeting, **kwargs)
+        if type(targets) is not list:
+            targets = [targets]
+
+        value = Moments(0.0)
+        for target, count in group_targets(targets):
+            kwargs['target'] = target
+            p = outcome_probabilities(self.evaluate(node.attack_roll, **kwargs))
+            value += Moments.mixture([(p[k], results[k]) for k in p]).repeat(count)
+        return value
+
+    def evaluate_RollNode(self, node):
+        if type(node.value) is str:
+            return Dice_Roller.cached(node.value, backend='moments').value
+        elif type(node.value) is dict:
+            total = sum(node.value.values())
+            return Moments.mixture([(q/total, Moments(k)) for k, q in node.value.items()])
+
+    def evaluate_SaveNode(self, node, **kwargs):
+        targets = self.evaluate(node.targeting, **kwargs)
+        if type(targets) is not list:
+            targets = [targets]
+
+        # the number of failures is a sum of independent Bernoulli trials
+        failures = Moments(0.0)
+        for target, count in group_targets(targets):
+            kwargs['target'] = target
+            p = outcome_probabilities(self.evaluate(node.save_roll, **kwargs)).get('failure', 0.0)
+            failures += Moments(p, p*(1 - p)).repeat(count)
+
+        damage = Moments.of(self.evaluate(node.results['failure']))
+        m = node.results['success']
+        n = len(targets)
+        if damage.var == 0:
+            # constant damage: total = n*floor(m*damage) + failures*(damage - floor(m*damage))
+            partial = math.floor(m*damage.mu)
+            return failures*(damage.mu - partial) + n*partial
+
+        # total = damage*(failures + m*(n - failures)), with the damage rolled once
+        share = Moments(m*n + (1 - m)*failures.mu, (1 - m)**2*failures.var)
+        return damage*share
+
+    def evaluate_SelectionNode(self, node, **kwargs):
+        p = outcome_probabilities(self.evaluate(node.selector, **kwargs))
+        results = {k: Moments.of(self.evaluate(v)) for k, v in node.results.items()}
+        return Moments.mixture([(p[k], results[k]) for k in p])
@@ -1,5 +1,4 @@
 from dataclasses import dataclass
-import sys
 
 NODE_LIST = [
     'AndNode',
@@ -19,33 +18,54 @@ NODE_LIST = [
     'ValueNode',
 ]
 
+def value_to_dict(value):
+    """Converts a field value into dictionary form if it is a node.
+    """
+    return value.to_dict() if type(value) in NODE_TYPES else value
+
+
 def dict_to_node(node_dict):
     """Converts an abstract syntax tree in dictionary form into a node base representation.
+
+    The input is left unchanged: dicts and lists are copied as they are converted.
+    Dicts with a 'node' key become nodes, empty dicts become EmptyNode and any
+    other dicts are kept as dicts of converted values.
     """
     if not node_dict:
         return EmptyNode()
 
-    for k, v in node_dict.items():
-        if type(v) == dict:
-            node_dict[k] = dict_to_node(v)
-        elif type(v) == list:
-            for i in range(len(v)):
-                if type(v[i]) == dict:
-                    v[i] = dict_to_node(v[i])
-            """for e in v:
-                if type(e) == dict:
-                    e = dict_to_node(e)"""
-
-    
-    if 'node' in node_dict:
-        class_name = node_dict.pop('node')
-        new_node = getattr(sys.modules[__name__], f'{class_name}Node')
-        return new_node(**node_dict)
-    else:
-        return node_dict
-
-
-@dataclass
+    root = [node_dict]
+    # walk the tree in pre-order, copying containers and noting every dict with a
+    # 'node' key, then build the nodes in reverse so children exist before parents
+    pending = []
+    stack = [(node_dict, root, 0)]
+    while stack:
+        source, parent, key = stack.pop()
+        if not source:
+            parent[key] = EmptyNode()
+            continue
+        converted = parent[key] = dict(source)
+        if 'node' in converted:
+            pending.append((converted, parent, key))
+        for k, v in converted.items():
+            if type(v) is dict:
+                stack.append((v, converted, k))
+            elif type(v) is list:
+                v = converted[k] = list(v)
+                for i, e in enumerate(v):
+                    if type(e) is dict:
+                        stack.append((e, v, i))
+
+    for converted, parent, key in reversed(pending):
+        name = converted.pop('node')
+        node_class = NODE_CLASSES.get(name)
+        if node_class is None:
+            raise ValueError(f'unknown node type {name!r}')
+        parent[key] = node_class(**converted)
+    return root[0]
+
+
+@dataclass(slots=True, frozen=True)
 class AndNode:
     """
     type = Control
@@ -73,7 +93,7 @@ class AndNode:
         }
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class AttackNode:
     """
     type = ?
@@ -115,12 +135,7 @@ class AttackNode:
         return f'{self.to_dict()}'
     
     def to_dict(self):
-        results = {}
-        for k, v in self.results.items():
-            if type(v).__name__ in NODE_LIST:
-                results[k] = v.to_dict()
-            else:
-                results[k] = v
+        results = {k: value_to_dict(v) for k, v in self.results.items()}
         
         return {
             'node': 'Attack',
@@ -130,7 +145,7 @@ class AttackNode:
         }
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class AttackRollNode:
     """
     type = roll
@@ -164,17 +179,16 @@ class AttackRollNode:
         return f'{self.to_dict()}'
     
     def to_dict(self):
-        d = {'node': 'AttackRoll'}
-        for k, v in self.__dict__.items():
-            if type(v).__name__ in NODE_LIST:
-                d[k] = v.to_dict()
-            else:
-                d[k] = v
-
-        return d
+        return {
+            'node': 'AttackRoll',
+            'critical_hit_range': value_to_dict(self.critical_hit_range),
+            'critical_miss_range': value_to_dict(self.critical_miss_range),
+            'attack_bonus': value_to_dict(self.attack_bonus),
+            'armor_class': value_to_dict(self.armor_class),
+        }
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ConditionNode:
     """
     type = effect
@@ -202,7 +216,7 @@ class ConditionNode:
         }
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class DamageNode:
     value: any
     type: str
@@ -218,7 +232,7 @@ class DamageNode:
         }
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class DurationNode:
     """
     type = ?
@@ -246,7 +260,7 @@ class DurationNode:
         }
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class MoveNode:
     """
     type = effect
@@ -271,7 +285,7 @@ class MoveNode:
         }
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class EmptyNode:
 
     def __repr__(self):
@@ -283,11 +297,11 @@ class EmptyNode:
         }
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ReferenceNode:
     """
     type = value
-    Used to reference specific stats from a target.
+    Used to reference specific stats from a target. Paths can be nested to any depth, e.g. 'target.saves.dex'.
     {
         'node': 'Reference',
         'value': 'target.AC',
@@ -305,7 +319,7 @@ class ReferenceNode:
         }
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class RollNode:
     """
     type = roll
@@ -336,7 +350,7 @@ class RollNode:
         }
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class SaveNode:
     """
     type = ?
@@ -377,12 +391,7 @@ class SaveNode:
         return f'{self.to_dict()}'
     
     def to_dict(self):
-        results = {}
-        for k, v in self.results.items():
-            if type(v).__name__ in NODE_LIST:
-                results[k] = v.to_dict()
-            else:
-                results[k] = v
+        results = {k: value_to_dict(v) for k, v in self.results.items()}
         
         return {
             'node': 'Save',
@@ -392,7 +401,7 @@ class SaveNode:
         }
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class SaveRollNode:
     """
     type = roll
@@ -418,17 +427,14 @@ class SaveRollNode:
         return f'{self.to_dict()}'
     
     def to_dict(self):
-        d = {'node': 'SaveRoll'}
-        for k, v in self.__dict__.items():
-            if type(v).__name__ in NODE_LIST:
-                d[k] = v.to_dict()
-            else:
-                d[k] = v
-
-        return d
+        return {
+            'node': 'SaveRoll',
+            'save_dc': value_to_dict(self.save_dc),
+            'save_bonus': value_to_dict(self.save_bonus),
+        }
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class SelectionNode:
     """
     type = control
@@ -461,12 +467,7 @@ class SelectionNode:
         return f'{self.to_dict()}'
     
     def to_dict(self):
-        results = {}
-        for k, v in self.results.items():
-            if type(v).__name__ in NODE_LIST:
-                results[k] = v.to_dict()
-            else:
-                results[k] = v
+        results = {k: value_to_dict(v) for k, v in self.results.items()}
         
         return {
             'node': 'Selection',
@@ -475,7 +476,7 @@ class SelectionNode:
         }
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class TargetingNode:
     """
     type = control
@@ -516,7 +517,7 @@ class TargetingNode:
         }
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ValueNode:
     """
     type = value
@@ -538,4 +539,14 @@ class ValueNode:
         return {
             'node': 'Value',
             'value': self.value,
-        }
\ No newline at end of file
+        }
+
+
+# maps the 'node' names used in dictionary form to their classes
+NODE_CLASSES = {name.removesuffix('Node'): globals()[name] for name in NODE_LIST}
+NODE_TYPES = frozenset(NODE_CLASSES.values())
+
+# frozen dataclasses get a __hash__ built from their fields, which raises TypeError
+# for nodes holding lists or dicts, so nodes stay unhashable as they were before
+for node_class in NODE_TYPES:
+    node_class.__hash__ = None
@@ -0,0 +1,109 @@
+"""
+Rewrites node trees into equivalent ones that are cheaper to evaluate.
+"""
+from dataclasses import fields
+from .nodes import *
+
+def is_number(value):
+    return type(value) in (int, float)
+
+def is_integer_valued(value):
+    """Returns True if value evaluates to whole numbers, or to a distribution of them,
+    which add up exactly in any order whether they are ints or floats. Damage and
+    roll expressions with a division or a decimal point do not count.
+    """
+    if is_number(value):
+        return float(value).is_integer()
+    match value:
+        case ValueNode():
+            return is_integer_valued(value.value)
+        case DamageNode() | RollNode():
+            if type(value.value) is str:
+                return '/' not in value.value and '.' not in value.value
+            return type(value.value) is dict and all(is_integer_valued(k) for k in value.value)
+        case AndNode():
+            return all(is_integer_valued(v) for v in value.values)
+        case AttackNode() | SelectionNode():
+            return all(is_integer_valued(v) for v in value.results.values())
+        case SaveNode():
+            return is_integer_valued(value.results['failure']) and is_number(value.results['success'])
+    return False
+
+
+class Optimizer:
+    """Rewrites a node tree into an equivalent one that is cheaper to evaluate.
+
+    Sums whose terms all evaluate to whole numbers are rewritten: nested AndNodes
+    are flattened into their parent, integer zero terms are dropped, constant
+    terms are added together and the DamageNodes of each damage type are merged
+    into one dice expression, so that the dice roller can pool them (1d8 + 2d8 ->
+    3d8) and they are convolved once. An AndNode left with a single term is
+    replaced by that term. Whole numbers add up exactly in any order, so the
+    Interpreter gives the same result for the optimized tree, and raises for the
+    same trees. Other sums are left as they are. The input tree is left unchanged.
+    """
+    def optimize(self, node):
+        """Returns an optimized copy of node, which may also be in dictionary form.
+        """
+        if type(node) is dict:
+            node = dict_to_node(node)
+        return self.optimize_value(node)
+
+    def optimize_value(self, value):
+        if type(value) in NODE_TYPES:
+            method_name = f'optimize_{type(value).__name__}'
+            method = getattr(self, method_name, self.optimize_fields)
+            return method(value)
+        if type(value) is dict:
+            return {k: self.optimize_value(v) for k, v in value.items()}
+        if type(value) is list:
+            return [self.optimize_value(v) for v in value]
+        return value
+
+    def optimize_fields(self, node):
+        return type(node)(*[self.optimize_value(getattr(node, f.name)) for f in fields(node)])
+
+    def optimize_RollNode(self, node):
+        return node
+
+    def optimize_DamageNode(self, node):
+        return node
+
+    def optimize_ValueNode(self, node):
+        return node
+
+    def collect_terms(self, node, terms):
+        """Flattens nested AndNodes into a list of optimized terms.
+        """
+        for value in node.values:
+            if type(value) is AndNode:
+                self.collect_terms(value, terms)
+                continue
+            terms.append(self.optimize_value(value))
+
+    def optimize_AndNode(self, node):
+        if not is_integer_valued(node):
+            return self.optimize_fields(node)
+        terms = []
+        self.collect_terms(node, terms)
+
+        constant = 0
+        damage = {}
+        others = []
+        for term in terms:
+            if type(term) is ValueNode:
+                term = term.value
+            if is_number(term):
+                constant += term
+            elif type(term) is DamageNode and type(term.value) is str:
+                damage.setdefault(term.type, []).append(term.value)
+            else:
+                others.append(term)
+
+        # parenthesized, so that each expression is still parsed on its own
+        values = [DamageNode(v[0] if len(v) == 1 else ' + '.join(f'({e})' for e in v), t) for t, v in damage.items()] + others
+        if constant != 0 or type(constant) is not int or not values:
+            values.append(ValueNode(constant))
+        if len(values) == 1:
+            return values[0]
+        return AndNode(values)
@@ -0,0 +1,174 @@
+"""
+Streaming evaluation of trees stored as JSON lines.
+
+Each input line is either a tree in dictionary form, or a record holding the
+tree under 'tree' alongside any other fields (e.g. an 'id'), which are copied to
+the output. Trees are read, evaluated and summarized one at a time, so memory
+use does not grow with the size of the input. Usage:
+
+    python -m dndast.pipeline trees.jsonl --targets targets.json [--output stats.jsonl] [--workers 4] [--cache results.db]
+"""
+import argparse
+import itertools
+import json
+import sys
+import threading
+from collections import deque
+from fractions import Fraction
+from icepool import Die
+from .nodes import dict_to_node
+from .interpreter import Interpreter
+from .cache import ResultCache
+
+PERCENTILES = (5, 25, 50, 75, 95)
+# the ResultCaches opened by each worker, per thread since SQLite connections cannot be shared between threads
+WORKER_CACHES = threading.local()
+
+def summarize(result, percentiles=PERCENTILES):
+    """Returns the mean, standard deviation, range, percentiles and number of
+    outcomes of an evaluated tree as a JSON-compatible dict.
+    """
+    if isinstance(result, Die):
+        summary = {
+            'mean': float(result.mean()),
+            'sd': float(result.sd()),
+            'min': result.min_outcome(),
+            'max': result.max_outcome(),
+            'outcomes': len(result),
+        }
+        quantiles = {}
+        for p in percentiles:
+            q = Fraction(str(p))/100
+            quantiles[str(p)] = result.quantile_low(q.numerator, q.denominator)
+        summary['percentiles'] = quantiles
+        return summary
+    if type(result) in (bool, int, float):
+        return {
+            # bools are reported as is, but their mean as a probability
+            'mean': float(result) if type(result) is bool else result,
+            'sd': 0.0,
+            'min': result,
+            'max': result,
+            'outcomes': 1,
+            'percentiles': {str(p): result for p in percentiles},
+        }
+    if hasattr(result, 'mean') and hasattr(result, 'sd'):
+        return {'mean': float(result.mean()), 'sd': float(result.sd())}
+    raise TypeError(f'cannot summarize {type(result).__name__} results')
+
+
+def evaluate_line(interpreter, line, percentiles=PERCENTILES, cache=None):
+    """Evaluates one JSON line, returning its summary, or its error message if it fails.
+    Either way the other fields of a record are kept. Results are looked up in and
+    added to cache, a ResultCache, if one is given.
+    """
+    extra = {}
+    try:
+        record = json.loads(line)
+        if 'node' in record:
+            tree = record
+        else:
+            extra = {k: v for k, v in record.items() if k != 'tree'}
+            tree = record['tree']
+        node = dict_to_node(tree)
+        result = cache.evaluate(interpreter, node) if cache is not None else interpreter.evaluate(node)
+        return {**extra, **summarize(result, percentiles)}
+    except Exception as e:
+        return {**extra, 'error': f'{type(e).__name__}: {e}'}
+
+
+def worker_cache(path):
+    """Returns the ResultCache for path of the current worker, opening it on first use,
+    so that a worker keeps one connection for every chunk it evaluates.
+    """
+    caches = getattr(WORKER_CACHES, 'caches', None)
+    if caches is None:
+        caches = WORKER_CACHES.caches = {}
+    cache = caches.get(path)
+    if cache is None:
+        cache = caches[path] = ResultCache(path)
+    return cache
+
+
+def evaluate_chunk(targets, lines, percentiles=PERCENTILES, cache=None):
+    """Evaluates a list of JSON lines with a new Interpreter, so that it can run in a worker process.
+    """
+    interpreter = Interpreter(targets)
+    result_cache = worker_cache(cache) if cache is not None else None
+    return [evaluate_line(interpreter, line, percentiles, result_cache) for line in lines]
+
+
+def evaluate_stream(lines, targets, percentiles=PERCENTILES, executor=None, chunk_size=256, max_pending=8, cache=None):
+    """Yields a summary for each non-blank line of JSON, in input order.
+        lines: (iterable) JSON lines, e.g. an open file.
+        targets: (dict) The targets passed to the Interpreter.
+        percentiles: (list) The percentiles to report.
+        executor: (Executor) Optional concurrent.futures executor to evaluate chunks of lines in parallel.
+        chunk_size: (int) The number of lines sent to the executor at a time.
+        max_pending: (int) The most chunks in flight at once, which bounds memory use.
+        cache: (str) Optional path of a ResultCache database shared between runs and workers.
+
+    Lines that fail to parse or evaluate yield {'error': message} so that one bad
+    tree does not stop the stream. Each summary also records its 1-based line number.
+    """
+    numbered = ((i, line) for i, line in enumerate(lines, 1) if line.strip())
+    if executor is None:
+        interpreter = Interpreter(targets)
+        result_cache = ResultCache(cache) if cache is not None else None
+        try:
+            for i, line in numbered:
+                yield {'line': i, **evaluate_line(interpreter, line, percentiles, result_cache)}
+        finally:
+            if result_cache is not None:
+                result_cache.close()
+        return
+
+    pending = deque()
+    while True:
+        chunk = list(itertools.islice(numbered, chunk_size))
+        if chunk:
+            numbers = [i for i, _ in chunk]
+            pending.append((numbers, executor.submit(evaluate_chunk, targets, [line for _, line in chunk], percentiles, cache)))
+        # results are yielded in order, waiting for the oldest chunk once enough are in flight
+        while pending and (len(pending) >= max_pending or not chunk):
+            numbers, future = pending.popleft()
+            for i, summary in zip(numbers, future.result()):
+                yield {'line': i, **summary}
+        if not chunk:
+            return
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Evaluates trees from a JSON lines file and writes summary statistics as JSON lines.')
+    parser.add_argument('input', help="JSON lines of trees, or '-' for standard input")
+    parser.add_argument('--targets', required=True, help='JSON file with the targets passed to the Interpreter')
+    parser.add_argument('--output', help='where to write the summaries, standard output by default')
+    parser.add_argument('--percentiles', type=float, nargs='+', default=[float(p) for p in PERCENTILES])
+    parser.add_argument('--workers', type=int, default=0, help='evaluate chunks of lines in this many processes')
+    parser.add_argument('--chunk-size', type=int, default=256)
+    parser.add_argument('--cache', help='SQLite file in which to keep results between runs')
+    args = parser.parse_args(argv)
+
+    with open(args.targets) as f:
+        targets = json.load(f)
+    percentiles = [int(p) if p.is_integer() else p for p in args.percentiles]
+    source = sys.stdin if args.input == '-' else open(args.input)
+    output = open(args.output, 'w') if args.output else sys.stdout
+    executor = None
+    if args.workers:
+        from concurrent.futures import ProcessPoolExecutor
+        executor = ProcessPoolExecutor(args.workers)
+    try:
+        for summary in evaluate_stream(source, targets, percentiles, executor, args.chunk_size, cache=args.cache):
+            output.write(json.dumps(summary) + '\n')
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == '__main__':
+    main()
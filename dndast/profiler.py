@@ -0,0 +1,126 @@
+"""
+Per-node instrumentation for the Interpreter.
+
+Any object with enter(node) and exit(result) methods can be passed as the
+profiler of an Interpreter, and is called around the evaluation of every node.
+Profiler is the built-in implementation: it records call counts, wall time and
+the number of outcomes in each result, grouped by node type and by tree path,
+and keeps accumulating across trees so a whole corpus run can be reported at once.
+"""
+import time
+from dataclasses import dataclass
+
+def outcome_count(result):
+    """Returns the number of distinct outcomes of a result, 1 for plain numbers
+    and None for anything else (e.g. the target lists of a TargetingNode).
+    """
+    if type(result) in (int, float, bool):
+        return 1
+    if hasattr(result, 'outcomes'):
+        return len(result.outcomes())
+    if hasattr(result, 'mean'):
+        return 1
+    return None
+
+
+@dataclass
+class NodeStats:
+    """Aggregated measurements for one node type or tree path.
+        calls: (int) The number of times a node was evaluated.
+        total: (float) Wall time in seconds, including children.
+        own: (float) Wall time in seconds, excluding children.
+        outcomes: (int) The total number of outcomes returned.
+        max_outcomes: (int) The largest number of outcomes returned by a single call.
+    """
+    calls: int = 0
+    total: float = 0.0
+    own: float = 0.0
+    outcomes: int = 0
+    max_outcomes: int = 0
+
+    def add(self, elapsed, own, outcomes):
+        self.calls += 1
+        self.total += elapsed
+        self.own += own
+        if outcomes is not None:
+            self.outcomes += outcomes
+            self.max_outcomes = max(self.max_outcomes, outcomes)
+
+    def merge(self, other):
+        self.calls += other.calls
+        self.total += other.total
+        self.own += other.own
+        self.outcomes += other.outcomes
+        self.max_outcomes = max(self.max_outcomes, other.max_outcomes)
+
+
+class Profiler:
+    """Records the cost of every node evaluated by an Interpreter.
+
+    Paths are the chain of node types from the root, e.g. 'AndNode/SaveNode/DamageNode',
+    so that equivalent positions in different trees are aggregated together.
+    """
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.by_type = {}
+        self.by_path = {}
+        self.stack = []
+
+    def enter(self, node):
+        path = type(node).__name__
+        if self.stack:
+            path = f'{self.stack[-1][0]}/{path}'
+        # [path, start time, time spent in children]
+        self.stack.append([path, self.clock(), 0.0])
+
+    def exit(self, result):
+        path, start, children = self.stack.pop()
+        elapsed = self.clock() - start
+        if self.stack:
+            self.stack[-1][2] += elapsed
+        outcomes = outcome_count(result)
+        name = path.rsplit('/', 1)[-1]
+        self.by_type.setdefault(name, NodeStats()).add(elapsed, elapsed - children, outcomes)
+        self.by_path.setdefault(path, NodeStats()).add(elapsed, elapsed - children, outcomes)
+
+    def clear(self):
+        self.by_type.clear()
+        self.by_path.clear()
+        self.stack.clear()
+
+    def merge(self, other):
+        """Adds the measurements of another Profiler, e.g. one used by a worker process.
+        """
+        for mine, theirs in [(self.by_type, other.by_type), (self.by_path, other.by_path)]:
+            for key, stats in theirs.items():
+                mine.setdefault(key, NodeStats()).merge(stats)
+        return self
+
+    def stats(self, by='type'):
+        match by:
+            case 'type':
+                return self.by_type
+            case 'path':
+                return self.by_path
+            case _:
+                raise ValueError(f'unknown grouping {by!r}, expected type or path')
+
+    def report(self, by='type', sort='own', limit=None):
+        """Returns a text table of the measurements, most expensive first, with the
+        mean and largest number of outcomes returned per call.
+            by: (str) Group by node 'type' or tree 'path'.
+            sort: (str) The NodeStats field to sort by.
+            limit: (int) The maximum number of rows.
+        """
+        rows = sorted(self.stats(by).items(), key=lambda item: getattr(item[1], sort), reverse=True)
+        if limit is not None:
+            rows = rows[:limit]
+        width = max([len(by)] + [len(key) for key, _ in rows])
+        lines = [f'{by:<{width}} {"calls":>8} {"total ms":>10} {"own ms":>10} {"ms/call":>9} {"outcomes":>9} {"max":>7}']
+        for key, s in rows:
+            mean_outcomes = s.outcomes/s.calls if s.calls else 0
+            lines.append(
+                f'{key:<{width}} {s.calls:>8} {1e3*s.total:>10.2f} {1e3*s.own:>10.2f} '
+                f'{1e3*s.total/s.calls:>9.3f} {mean_outcomes:>9.1f} {s.max_outcomes:>7}'
+            )
+        return '\n'.join(lines)
@@ -0,0 +1,53 @@
+"""
+Targets and tree builders shared by the test modules.
+"""
+
+TARGETS = {
+    'maxtargets': 5,
+    'melee_maxtargets': 2,
+    'melee_target': {
+        'armor_class': 18,
+        'strength_save_bonus': 1,
+        'dexterity_save_bonus': 0,
+        'constitution_save_bonus': 2,
+        'intelligence_save_bonus': 1,
+        'wisdom_save_bonus': 2,
+        'charisma_save_bonus': 2,
+    },
+    'ranged_targetarea': 10**2,
+    'ranged_maxtargets': 4,
+    'ranged_target': {
+        'armor_class': 12,
+        'strength_save_bonus': 1,
+        'dexterity_save_bonus': 0,
+        'constitution_save_bonus': 2,
+        'intelligence_save_bonus': 1,
+        'wisdom_save_bonus': 2,
+        'charisma_save_bonus': 2,
+    },
+}
+
+def attack(hit, critical_hit, attack_bonus=4, critical_hit_range=(20,), max_targets=1):
+    """Returns a melee attack against the target's armor class in dictionary form.
+    String results become slashing DamageNodes, anything else is used as it is.
+    """
+    def result(value):
+        return {'node': 'Damage', 'value': value, 'type': 'slashing'} if type(value) is str else value
+
+    return {
+        'node': 'Attack',
+        'targeting': {'node': 'Targeting', 'range': '5 feet', 'area': None, 'max_targets': max_targets, 'min_targets': 0},
+        'attack_roll': {
+            'node': 'AttackRoll',
+            'critical_hit_range': list(critical_hit_range),
+            'critical_miss_range': [1],
+            'attack_bonus': attack_bonus,
+            'armor_class': {'node': 'Reference', 'value': 'target.armor_class'},
+        },
+        'results': {
+            'critical miss': 0,
+            'miss': 0,
+            'hit': result(hit),
+            'critical hit': result(critical_hit),
+        },
+    }
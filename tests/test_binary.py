@@ -0,0 +1,79 @@
+import json
+import pytest
+from dndast.nodes import *
+from dndast.binary import dumps, loads, dumps_all, loads_all
+
+TREE = {
+    'node': 'And',
+    'values': [
+        {
+            'node': 'Attack',
+            'targeting': {'node': 'Targeting', 'range': '5 feet', 'area': None, 'max_targets': 1, 'min_targets': 0},
+            'attack_roll': {
+                'node': 'AttackRoll',
+                'critical_hit_range': [19, 20],
+                'critical_miss_range': [1],
+                'attack_bonus': -2,
+                'armor_class': {'node': 'Reference', 'value': 'target.armor_class'},
+            },
+            'results': {
+                'critical miss': 0,
+                'miss': 0,
+                'hit': {'node': 'Damage', 'value': '1d6 + 2', 'type': 'slashing'},
+                'critical hit': {'node': 'Damage', 'value': '2d6 + 2', 'type': 'slashing'},
+            },
+        },
+        {
+            'node': 'Save',
+            'targeting': {'node': 'Targeting', 'range': '60 feet', 'area': {'shape': 'cone', 'length': '15 feet'}, 'max_targets': 3, 'min_targets': 0},
+            'save_roll': {'node': 'SaveRoll', 'save_dc': 13, 'save_bonus': {'node': 'Reference', 'value': 'target.dexterity_save_bonus'}},
+            'results': {'failure': {'node': 'Roll', 'value': {2: 1, 3: 1, 4: 1, 5: 1}}, 'success': 0.5},
+        },
+        {'node': 'Condition', 'value': 'Frightened — until the end of its next turn', 'duration': {'node': 'Duration', 'value': ['1 minute', 'concentration']}},
+        {'node': 'Value', 'value': [True, False, None, 2**70, -2**70, 1e-300]},
+        {'node': 'Empty'},
+        {'node': 'Move', 'value': '15 feet'},
+    ],
+}
+
+
+def test_binary_round_trip():
+    tree = dict_to_node(TREE)
+    data = dumps(tree)
+    assert loads(data) == tree
+    assert loads(data).to_dict() == TREE
+    assert dumps(TREE) == data
+
+    trees = [tree, dict_to_node(TREE['values'][0]), EmptyNode()]
+    assert loads_all(dumps_all(trees)) == trees
+    assert loads_all(dumps_all([])) == []
+
+
+def test_binary_size():
+    trees = [dict_to_node(TREE)]*100
+    data = dumps_all(trees)
+    # repeated strings are stored once
+    assert data.count('slashing'.encode()) == 1
+    assert len(data) < len(json.dumps([TREE]*100))/5
+
+
+def test_binary_errors():
+    with pytest.raises(ValueError):
+        loads(b'JSON' + dumps(TREE)[4:])
+    with pytest.raises(ValueError):
+        loads(b'DAST\x02')
+    with pytest.raises(ValueError, match='invalid opcode'):
+        loads(b'DAST\x01\xff')
+    with pytest.raises(TypeError):
+        dumps(ValueNode((1, 2)))
+
+    data = dumps(TREE)
+    for n in range(4, len(data)):
+        with pytest.raises(ValueError, match='truncated'):
+            loads(data[:n])
+    with pytest.raises(ValueError, match='unexpected data'):
+        loads(dumps_all([TREE, TREE]))
+    with pytest.raises(ValueError, match='unexpected data'):
+        loads(data + b'\x00')
+    with pytest.raises(ValueError, match='invalid string reference'):
+        loads(b'DAST\x01\x46\x00')
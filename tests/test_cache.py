@@ -0,0 +1,77 @@
+import pytest
+from icepool import d
+from dndast.nodes import *
+from dndast.interpreter import Interpreter
+from dndast.moments import MomentInterpreter
+from dndast.cache import ResultCache, decode_result, encode_result
+from .helpers import TARGETS, attack
+
+
+def test_encode_result():
+    die = 3@d(6) + 0.5
+    assert decode_result(encode_result(die)).equals(die)
+    for value in [None, 3, 2.5, 'hit']:
+        assert decode_result(encode_result(value)) == value
+    assert encode_result(object()) is None
+
+
+def test_result_key():
+    node = dict_to_node(attack('1d6', '2d6'))
+    interpreter = Interpreter(TARGETS)
+    key = interpreter.result_key(node)
+    assert interpreter.analysis is None
+    assert key == Interpreter(TARGETS, memo=True).result_key(dict_to_node(attack('1d6', '2d6')))
+    assert key != interpreter.result_key(dict_to_node(attack('1d6', '2d8')))
+    assert key != Interpreter({**TARGETS, 'melee_target': {**TARGETS['melee_target'], 'armor_class': 16}}).result_key(node)
+    assert key != MomentInterpreter(TARGETS).result_key(node)
+
+    # keys do not depend on the insertion order of the target values read
+    reference = AndNode([ReferenceNode('target')])
+    assert interpreter.result_key(reference, target={'a': 1, 'b': {2, 3}}) == interpreter.result_key(reference, target={'b': {3, 2}, 'a': 1})
+    assert interpreter.result_key(reference, target={'a': 1, 'b': 2}) != interpreter.result_key(reference, target={'a': 2, 'b': 1})
+
+
+def test_result_cache(tmp_path, monkeypatch):
+    path = str(tmp_path / 'results.db')
+    node = dict_to_node(attack('1d6', '2d6'))
+    expected = Interpreter(TARGETS).evaluate(node)
+    with ResultCache(path) as cache:
+        assert cache.evaluate(Interpreter(TARGETS), node).equals(expected)
+        assert cache.info()['misses'] == 1
+
+    # results persist between instances, and only depend on the target values read
+    with ResultCache(path) as cache:
+        other_stats = {**TARGETS, 'melee_target': {**TARGETS['melee_target'], 'wisdom_save_bonus': 5}}
+        assert cache.evaluate(Interpreter(other_stats), dict_to_node(attack('1d6', '2d6'))).equals(expected)
+        higher_ac = {**TARGETS, 'melee_target': {**TARGETS['melee_target'], 'armor_class': 20}}
+        assert not cache.evaluate(Interpreter(higher_ac), node).equals(expected)
+        assert (cache.hits, cache.misses, len(cache)) == (1, 1, 2)
+
+    # a new interpreter version does not read the old entries, which are kept until pruned
+    monkeypatch.setattr(Interpreter, 'VERSION', Interpreter.VERSION + 1)
+    with ResultCache(path) as cache:
+        assert cache.evaluate(Interpreter(TARGETS), node).equals(expected)
+        assert (cache.hits, cache.misses, len(cache)) == (0, 1, 3)
+        assert cache.prune() == 2
+        assert len(cache) == 1
+        assert cache.evaluate(Interpreter(TARGETS), node).equals(expected)
+        assert cache.hits == 1
+
+
+def test_result_cache_eviction():
+    cache = ResultCache(':memory:', max_bytes=None)
+    interpreter = Interpreter(TARGETS)
+    nodes = [dict_to_node(attack(f'{n}d6', f'{2*n}d6')) for n in range(1, 6)]
+    for node in nodes:
+        cache.evaluate(interpreter, node)
+    total = cache.size()
+    assert cache.stored == total
+    # replacing an entry does not count its data twice
+    cache.put(interpreter.result_key(nodes[0]), cache.version_of(interpreter), interpreter.evaluate(nodes[0]))
+    assert cache.stored == cache.size() == total
+    cache.evaluate(interpreter, nodes[0])
+    assert cache.evict(total - 1) > 0
+    assert cache.size() <= total - 1
+    # the most recently used entry is kept
+    assert cache.evaluate(interpreter, nodes[0]) is not None
+    assert cache.hits == 2
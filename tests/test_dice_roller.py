@@ -0,0 +1,190 @@
+import pytest
+from icepool import d, Die
+from dndast.dice_roller import Dice_Roller, LRUCache
+from dndast.dice_roller.lexer import Lexer, tokenize
+from dndast.dice_roller.dice_roller import normalize
+from dndast.dice_roller.tokens import Token, TokenType
+from dndast.dice_roller.parser_ import Parser
+from dndast.dice_roller.interpreter import Interpreter
+from dndast.dice_roller.compiler import Compiler
+from dndast.dice_roller.optimizer import Optimizer
+from dndast.dice_roller.fft import repeated_die
+from dndast.dice_roller.moments import die_moments
+
+def parse(eq_str):
+    return Parser(Lexer(eq_str).generate_tokens()).parse()
+
+
+
+def test_dice_roller():
+    assert Dice_Roller('1d6').value.mean() == 3.5
+    assert Dice_Roller('2d8 + 3').value.mean() == 12.0
+    assert Dice_Roller('(1d4 + 1) * 2').value.mean() == 7.0
+
+
+def test_dice_roller_cache():
+    Dice_Roller.cache_clear()
+    a = Dice_Roller.cached('2d8 + 3')
+    b = Dice_Roller.cached(' 2d8+3 ')
+    c = Dice_Roller.cached('2d8 + 4')
+    assert a is b
+    assert a is not c
+    assert Dice_Roller.cache_info() == {'hits': 1, 'misses': 2, 'size': 2, 'maxsize': 1024}
+
+    assert normalize('1 2d6') != normalize('12d6')
+    assert normalize('2 d6') != normalize('2d6')
+    assert Dice_Roller.cached('12d6').value.equals(12 @ d(6))
+    with pytest.raises(Exception, match='Invalid syntax'):
+        Dice_Roller.cached('1 2d6')
+    assert Dice_Roller.cached('1d6 + 4') is not Dice_Roller.cached('1d6 + 4.0')
+
+    Dice_Roller.cache_clear()
+    assert Dice_Roller.cache_info()['size'] == 0
+    assert Dice_Roller.cached('2d8 + 3') is not a
+
+
+def test_lru_cache():
+    cache = LRUCache(maxsize=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert 'a' in cache
+    assert 'b' not in cache
+    assert cache.get('b') is None
+    assert cache.info() == {'hits': 1, 'misses': 1, 'size': 2, 'maxsize': 2}
+
+    cache.resize(1)
+    assert len(cache) == 1
+    assert 'c' in cache
+
+
+def test_compiler():
+    for eq_str in ['1d6', '2d8 + 3', '-(1d4 - 2) * 3', '+1d6 / 2']:
+        tree = parse(eq_str)
+        program = Compiler().compile(tree)
+        assert program().equals(Interpreter().evaluate(tree))
+        assert program().equals(program())
+
+    tree = parse('1d6 / 0')
+    with pytest.raises(Exception, match='Runtime math error'):
+        Compiler().compile(tree)()
+
+
+def test_dice_roller_fft_backend():
+    for eq_str in ['20d6', '40d10', '8 * 20d6', '2d6 + 1d8 - 3', '-(1d4 + 1) * 2', '1d6 * 1d6', '(2 * 4d6) / 2']:
+        exact = Dice_Roller(eq_str).value
+        approx = Dice_Roller(eq_str, backend='fft').value
+        for outcome, probability in zip(exact.outcomes(), exact.probabilities()):
+            assert approx.probability(int(outcome)) == pytest.approx(probability, abs=1e-13)
+        assert approx.mean() == pytest.approx(exact.mean())
+        assert approx.variance() == pytest.approx(exact.variance())
+
+    with pytest.raises(Exception, match='Runtime math error'):
+        Dice_Roller('1d6 / 2', backend='fft')
+
+    with pytest.raises(ValueError):
+        Dice_Roller('1d6', backend='unknown')
+
+
+def test_dice_roller_moments_backend():
+    for eq_str in ['20d6', '2d6 + 1d8 - 3', '-(1d4 + 1) * 2', '1d6 * 1d6', '4d6kh3', '2d6r<3', '3d8 / 2']:
+        exact = Dice_Roller(eq_str).value
+        moments = Dice_Roller(eq_str, backend='moments').value
+        assert moments.mean() == pytest.approx(float(exact.mean()))
+        assert moments.variance() == pytest.approx(float(exact.variance()))
+
+    with pytest.raises(Exception, match='Runtime math error'):
+        Dice_Roller('1d6 / 1d4', backend='moments').value
+
+    for reroll in [0, 1]:
+        assert Dice_Roller(f'2d6r<{reroll}', backend='moments').value.mean() == pytest.approx(7.0)
+        assert die_moments(2, 6, reroll).mean() == pytest.approx(7.0)
+        assert die_moments(2, 6, reroll).variance() == pytest.approx(die_moments(2, 6).variance())
+
+
+def test_compiler_backends():
+    program = Compiler().compile(parse('10d6 + 2'))
+    assert program().mean() == 37
+    assert program('fft').mean() == pytest.approx(37)
+    assert Dice_Roller.cached('10d6+2', backend='fft') is not Dice_Roller.cached('10d6+2')
+
+
+def test_optimizer():
+    assert repr(Optimizer().optimize(parse('2*3 + 1d6'))) == '(1d6+6.0)'
+    assert repr(Optimizer().optimize(parse('1d6 + 1d6'))) == '2d6'
+    assert repr(Optimizer().optimize(parse('(1d6 + 2) + (1d6 - 1) + 1d4'))) == '((2d6+1d4)+1.0)'
+    assert repr(Optimizer().optimize(parse('2 - 1d6 - 1d6'))) == '((-2d6)+2.0)'
+    assert repr(Optimizer().optimize(parse('1d6 * 2 * 3'))) == '(6.0*1d6)'
+    assert repr(Optimizer().optimize(parse('1d6 - 1d6'))) == '(1d6-1d6)'
+
+    for eq_str in ['2*3 + 1d6', '-(1d6 + 2) - 1d6', '4/2 + 3d8 + 1d8', '(1d6 + 1d4) * (2 + 1d4)', '1d6 + 0']:
+        assert Dice_Roller(eq_str).value.equals(Dice_Roller(eq_str, optimize=False).value)
+
+
+def test_dice_roller_sample():
+    roller = Dice_Roller('(2d8 + 3) * 2 - 1d4', lazy=True)
+    rolls = roller.sample(10**5, rng=1)
+    assert 'value' not in roller.__dict__
+    assert 'value' in Dice_Roller('(2d8 + 3) * 2 - 1d4').__dict__
+    assert len(rolls) == 10**5
+    assert rolls.min() >= 6 and rolls.max() <= 37
+    assert rolls.mean() == pytest.approx(roller.value.mean(), abs=0.1)
+    assert (roller.sample(100, rng=5) == roller.sample(100, rng=5)).all()
+
+    with pytest.raises(Exception, match='Runtime math error'):
+        Dice_Roller('1d6 / (1d2 - 1)', lazy=True).sample(100, rng=1)
+    with pytest.raises(Exception, match='Runtime math error'):
+        Dice_Roller('1d6 / (1d2 - 1)')
+
+
+def test_tokenize():
+    for eq_str in ['1d6', '2d8 + 3', '  (1d10 +5)*2 ', '-1.5 / d4', '3.']:
+        assert tokenize(eq_str) == list(Lexer(eq_str).generate_tokens())
+
+    assert tokenize('2d6  +  4') == [
+        Token(TokenType.DIE, '2d6'),
+        Token(TokenType.PLUS),
+        Token(TokenType.NUMBER, 4),
+    ]
+    assert type(tokenize('4')[0][1]) is int
+    assert type(tokenize('4.5')[0][1]) is float
+
+    with pytest.raises(RuntimeError, match="'x' unexpected"):
+        tokenize('2d6 x 4')
+    with pytest.raises(RuntimeError, match="'x' unexpected"):
+        list(Lexer('2d6 x 4').generate_tokens())
+
+
+def test_dice_roller_keep_and_reroll():
+    assert tokenize('4d6kh3 + 2d6r<3') == [
+        Token(TokenType.DIE, '4d6kh3'),
+        Token(TokenType.PLUS),
+        Token(TokenType.DIE, '2d6r<3'),
+    ]
+    assert tokenize('2d20kl1') == list(Lexer('2d20kl1').generate_tokens())
+
+    assert Dice_Roller('4d6kh3').value.equals(d(6).highest(4, 3))
+    assert Dice_Roller('2d20kl1').value.equals(d(20).lowest(2, 1))
+    assert Dice_Roller('2d6r<3').value.equals(2 @ d(6).reroll([1, 2], depth=1))
+    assert Dice_Roller('1d20kh1').value.mean() == 10.5
+
+    assert repr(Optimizer().optimize(parse('2d6r<3 + 2d6r<3 + 4d6kh3 + 4d6kh3'))) == '((4d6r<3+4d6kh3)+4d6kh3)'
+
+    for eq_str in ['4d6kh3 + 2', '2d20kl1', '2d6r<3 + 1d6']:
+        exact = Dice_Roller(eq_str).value
+        approx = Dice_Roller(eq_str, backend='fft').value
+        assert approx.mean() == pytest.approx(exact.mean())
+        assert Dice_Roller(eq_str).sample(10**5, rng=1).mean() == pytest.approx(exact.mean(), abs=0.1)
+
+    # r<0 and r<1 never reroll, on every backend
+    for eq_str in ['2d6r<0', '2d6r<1']:
+        assert Dice_Roller(eq_str).value.equals(2 @ d(6))
+        approx = Dice_Roller(eq_str, backend='fft').value
+        assert approx.mean() == pytest.approx(7.0)
+        assert approx.variance() == pytest.approx((2 @ d(6)).variance())
+        assert Dice_Roller(eq_str).sample(10**5, rng=1).mean() == pytest.approx(7.0, abs=0.1)
+    assert repeated_die(2, 6, 0).mean() == pytest.approx(7.0)
+
+    with pytest.raises(ValueError):
+        Dice_Roller('2d6kh3')
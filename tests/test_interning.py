@@ -0,0 +1,45 @@
+import pytest
+from dataclasses import FrozenInstanceError
+from dndast.nodes import *
+from dndast.interning import Interner, fingerprint
+from .helpers import attack
+
+def test_fingerprint():
+    a = dict_to_node(attack('1d6', '2d6'))
+    assert fingerprint(a) == fingerprint(dict_to_node(attack('1d6', '2d6')))
+    # stable across processes and runs
+    assert fingerprint(a) == 'c16c2933205f212082e13048883336ab'
+    assert fingerprint(a) != fingerprint(dict_to_node(attack('1d6', '2d8')))
+    assert fingerprint(a) != fingerprint(dict_to_node(attack('1d6', '2d6', attack_bonus=4.0)))
+    assert fingerprint(ValueNode('1')) != fingerprint(ValueNode(1))
+    assert fingerprint(ValueNode([1, 2])) != fingerprint(ValueNode([[1, 2]]))
+
+
+def test_interner():
+    interner = Interner()
+    a = interner.intern(attack('1d6', '2d6'))
+    b = interner.intern(dict_to_node(attack('1d6', '2d6')))
+    c = interner.intern(attack('1d8', '2d8'))
+    assert a is b
+    assert a == dict_to_node(attack('1d6', '2d6'))
+    assert a.to_dict() == attack('1d6', '2d6')
+
+    # shared subtrees of different trees
+    assert c is not a
+    assert c.targeting is a.targeting
+    assert c.attack_roll is a.attack_roll
+    assert c.results['hit'] is not a.results['hit']
+    with pytest.raises(FrozenInstanceError):
+        c.targeting.range = '10 feet'
+
+    tree = interner.intern(AndNode([a, dict_to_node(attack('1d6', '2d6'))]))
+    assert tree.values[0] is tree.values[1] is a
+    assert interner.fingerprint(a) == fingerprint(dict_to_node(attack('1d6', '2d6')))
+    assert dict_to_node(attack('1d8', '2d8')) in interner
+    assert dict_to_node(attack('1d4', '2d8')) not in interner
+
+    info = interner.info()
+    assert info['size'] == len(interner) == 10
+    assert info['hits'] > 0
+    interner.clear()
+    assert len(interner) == 0
@@ -1,32 +1,14 @@
 import pytest
+import pickle
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from collections import OrderedDict
+from types import MappingProxyType
 from icepool import d, Die
 from dndast.nodes import *
 from dndast.interpreter import *
-
-TARGETS = {
-    'maxtargets': 5,
-    'melee_maxtargets': 2,
-    'melee_target': {
-        'armor_class': 18,
-        'strength_save_bonus': 1,
-        'dexterity_save_bonus': 0,
-        'constitution_save_bonus': 2,
-        'intelligence_save_bonus': 1,
-        'wisdom_save_bonus': 2,
-        'charisma_save_bonus': 2,
-    },
-    'ranged_targetarea': 10**2,
-    'ranged_maxtargets': 4,
-    'ranged_target': {
-        'armor_class': 12,
-        'strength_save_bonus': 1,
-        'dexterity_save_bonus': 0,
-        'constitution_save_bonus': 2,
-        'intelligence_save_bonus': 1,
-        'wisdom_save_bonus': 2,
-        'charisma_save_bonus': 2,
-    },
-}
+from dndast.analysis import accessor, dependencies, freeze
+from dndast.profiler import Profiler
+from .helpers import TARGETS
 
 
 def test_interpreter_and():
@@ -123,6 +105,34 @@ def test_interpreter_reference():
     tree = ReferenceNode('target')
     assert target == interpreter.evaluate(tree, target=target)
 
+    # nested references
+    target = {'saves': {'dex': 3, 'con': {'bonus': 0}}}
+    assert 3 == interpreter.evaluate(ReferenceNode('target.saves.dex'), target=target)
+    assert 0 == interpreter.evaluate(ReferenceNode('target.saves.con.bonus'), target=target)
+    assert None == interpreter.evaluate(ReferenceNode('target.saves.wis'), target=target)
+    assert None == interpreter.evaluate(ReferenceNode('target.saves.dex.bonus'), target=target)
+    assert None == interpreter.evaluate(ReferenceNode('caster.AC'), target=target)
+
+    tree = SaveRollNode(save_dc=12, save_bonus=ReferenceNode('target.saves.dex'))
+    assert dependencies(AndNode([tree, ReferenceNode('target.AC'), ReferenceNode('target')])) == {'target': {'saves.dex', 'AC'}}
+    assert accessor('target.saves.dex') is accessor('target.saves.dex')
+    assert accessor('target.saves.dex').field == 'saves.dex'
+
+    # memoized results are keyed on nested values too
+    interpreter = Interpreter(targets=TARGETS, memo=True)
+    a = interpreter.evaluate(tree, target={'saves': {'dex': 0}})
+    b = interpreter.evaluate(tree, target={'saves': {'dex': 5}})
+    assert a.equals(save_outcome_table(0 - 12))
+    assert b.equals(save_outcome_table(5 - 12))
+
+    # targets may be any mapping, not only a dict
+    target = OrderedDict(armor_class=15, saves=MappingProxyType({'dex': 2}))
+    assert 15 == Interpreter().evaluate(ReferenceNode('target.armor_class'), target=target)
+    assert 2 == Interpreter().evaluate(ReferenceNode('target.saves.dex'), target=target)
+    roll = AttackRollNode(critical_hit_range=[20], critical_miss_range=[1], attack_bonus=4, armor_class=ReferenceNode('target.armor_class'))
+    assert interpreter.evaluate(roll, target=target).equals(attack_outcome_table(4 - 15, (20,), (1,)))
+    assert interpreter.evaluate(tree, target=target).equals(save_outcome_table(2 - 12))
+
 
 def test_interpreter_roll():
     interpreter = Interpreter(targets=TARGETS)
@@ -270,4 +280,236 @@ def test_interpreter_value():
 
     assert 'string' == interpreter.evaluate(ValueNode('string'))
     assert 10 == interpreter.evaluate(ValueNode(10))
-    assert [1,2,3] == interpreter.evaluate(ValueNode([1,2,3]))
\ No newline at end of file
+    assert [1,2,3] == interpreter.evaluate(ValueNode([1,2,3]))
+
+def test_interpreter_memo():
+    bite = AttackNode(
+        targeting=TargetingNode(range='5 feet', area=None, max_targets=1, min_targets=0),
+        attack_roll=AttackRollNode(
+            critical_hit_range=[20],
+            critical_miss_range=[1],
+            attack_bonus=4,
+            armor_class=ReferenceNode('target.armor_class'),
+        ),
+        results={
+            'critical miss': 0,
+            'miss': 0,
+            'hit': DamageNode('1d6', 'piercing'),
+            'critical hit': DamageNode('2d6', 'piercing'),
+        },
+    )
+    tree = AndNode([bite, bite, AndNode([bite])])
+
+    interpreter = Interpreter(targets=TARGETS, memo=True)
+    result = interpreter.evaluate(tree)
+    assert result.equals(Interpreter(targets=TARGETS).evaluate(tree))
+    info = interpreter.memo_info()
+    assert info['hits'] == 2
+    assert info['hit_rate'] > 0
+
+    # subtrees reading different target values are not shared
+    selection = SelectionNode(selector=bite.attack_roll, results={'critical miss': 0, 'miss': 0, 'hit': 1, 'critical hit': 2})
+    a = interpreter.evaluate(selection, target={'armor_class': 10})
+    b = interpreter.evaluate(selection, target={'armor_class': 20})
+    assert not a.equals(b)
+    assert a.equals(Interpreter(targets=TARGETS).evaluate(selection, target={'armor_class': 10}))
+
+    interpreter.memo_clear()
+    assert interpreter.memo_info()['size'] == 0
+
+
+def test_interpreter_update_targets():
+    attack = AttackNode(
+        targeting=TargetingNode(range='5 feet', area=None, max_targets=1, min_targets=0),
+        attack_roll=AttackRollNode(critical_hit_range=[20], critical_miss_range=[1], attack_bonus=4, armor_class=ReferenceNode('target.armor_class')),
+        results={'critical miss': 0, 'miss': 0, 'hit': DamageNode('1d6', 'piercing'), 'critical hit': DamageNode('2d6', 'piercing')},
+    )
+    save = SaveNode(
+        targeting=TargetingNode(range='60 feet', area={'shape': 'sphere', 'radius': '20 feet'}, max_targets=4, min_targets=0),
+        save_roll=SaveRollNode(save_dc=13, save_bonus=ReferenceNode('target.dexterity_save_bonus')),
+        results={'failure': DamageNode('4d6', 'fire'), 'success': 0.5},
+    )
+    tree = AndNode([attack, save])
+
+    interpreter = Interpreter(targets=TARGETS)
+    interpreter.evaluate(tree)
+    targets = interpreter.update_targets({'ranged_target.dexterity_save_bonus': 5})
+    assert targets['ranged_target']['dexterity_save_bonus'] == 5
+    assert targets['melee_target'] is TARGETS['melee_target']
+    assert TARGETS['ranged_target']['dexterity_save_bonus'] == 0
+    interpreter.evaluate(tree)
+
+    # only the save and the AndNode above it are recomputed
+    misses = interpreter.memo_info()['misses']
+    interpreter.update_targets({'ranged_target.dexterity_save_bonus': 1})
+    result = interpreter.evaluate(tree)
+    assert interpreter.memo_info()['misses'] - misses == 3
+    assert result.equals(Interpreter(targets=interpreter.targets).evaluate(tree))
+
+    misses = interpreter.memo_info()['misses']
+    interpreter.update_targets({'melee_target.armor_class': 12, 'ranged_maxtargets': 2})
+    result = interpreter.evaluate(tree)
+    # the save roll of each remaining target is unchanged
+    assert interpreter.memo_info()['misses'] - misses == 4
+    assert result.equals(Interpreter(targets=interpreter.targets).evaluate(tree))
+
+
+def test_interpreter_evaluate_batch():
+    tree = AndNode([
+        AttackNode(
+            targeting=TargetingNode(range='5 feet', area=None, max_targets=1, min_targets=0),
+            attack_roll=AttackRollNode(critical_hit_range=[20], critical_miss_range=[1], attack_bonus=4, armor_class=ReferenceNode('target.armor_class')),
+            results={'critical miss': 0, 'miss': 0, 'hit': DamageNode('1d6', 'piercing'), 'critical hit': DamageNode('2d6', 'piercing')},
+        ),
+        SaveNode(
+            targeting=TargetingNode(range='60 feet', area={'shape': 'sphere', 'radius': '20 feet'}, max_targets=4, min_targets=0),
+            save_roll=SaveRollNode(save_dc=13, save_bonus=ReferenceNode('target.dexterity_save_bonus')),
+            results={'failure': DamageNode('4d6', 'fire'), 'success': 0.5},
+        ),
+    ])
+    def profile(ac, dex, name):
+        target = {'armor_class': ac, 'dexterity_save_bonus': dex, 'name': name}
+        return {**TARGETS, 'melee_target': target, 'ranged_target': target}
+    profiles = [profile(12, 1, 'a'), profile(15, 1, 'b'), profile(12, 1, 'c'), profile(12, 3, 'd'), {**profile(12, 1, 'e'), 'ranged_maxtargets': 2}]
+
+    interpreter = Interpreter()
+    groups = interpreter.group_profiles(tree, profiles)
+    assert [indices for _, indices in groups] == [[0, 2], [1], [3], [4]]
+
+    results = interpreter.evaluate_batch(tree, profiles)
+    for p, result in zip(profiles, results):
+        assert result.equals(Interpreter(targets=p).evaluate(tree))
+    assert results[0] is results[2]
+    assert interpreter.memo is None
+
+    with ThreadPoolExecutor(2) as executor:
+        pooled = interpreter.evaluate_batch(tree, profiles, executor=executor)
+    assert all(a.equals(b) for a, b in zip(pooled, results))
+
+    # worker processes use the same memo settings and report to the profiler
+    interpreter = Interpreter(memo=True, profiler=Profiler())
+    with ProcessPoolExecutor(1) as executor:
+        pooled = interpreter.evaluate_batch(tree, profiles, executor=executor)
+    assert all(a.equals(b) for a, b in zip(pooled, results))
+    assert interpreter.profiler.stats()['AndNode'].calls == len(groups)
+
+    nested = {'a': [d(6), (1, d(4))], 'b': 2}
+    unpacked = unpack_result(pickle.loads(pickle.dumps(pack_result(nested))))
+    assert unpacked['a'][0].equals(d(6)) and unpacked['a'][1][1].equals(d(4))
+    assert type(unpacked['a'][1]) is tuple and unpacked['b'] == 2
+
+
+def test_interpreter_identical_targets():
+    assert group_targets([{'AC': 10}, {'AC': 12}, {'AC': 10}]) == [[{'AC': 10}, 2], [{'AC': 12}, 1]]
+    assert repeated_sum(d(6), 0) == 0
+    for n in range(1, 6):
+        assert repeated_sum(d(6), n).equals(n @ d(6))
+
+    tree = AttackNode(
+        targeting=TargetingNode(range='60 feet', area=None, max_targets=4, min_targets=0),
+        attack_roll=AttackRollNode(
+            critical_hit_range=[20],
+            critical_miss_range=[1],
+            attack_bonus=4,
+            armor_class=ReferenceNode('target.armor_class'),
+        ),
+        results={'critical miss': 0, 'miss': 0, 'hit': 1, 'critical hit': 2},
+    )
+    interpreter = Interpreter(targets=TARGETS)
+    single = Die({0: 7, 1: 12, 2: 1})
+    assert interpreter.evaluate(tree).equals(single + single + single + single)
+
+
+def test_interpreter_outcome_tables():
+    tree = AttackRollNode(critical_hit_range=[19, 20], critical_miss_range=[1], attack_bonus=4, armor_class=10)
+    assert Interpreter().evaluate(tree) is attack_outcome_table(-6, (19, 20), (1,))
+    assert attack_outcome_table(-6, (19, 20), (1,)).equals(Die({'critical hit': 2, 'critical miss': 1, 'hit': 13, 'miss': 4}))
+    assert attack_outcome_table(20, (20,), (1,)).equals(Die({'critical hit': 1, 'critical miss': 1, 'hit': 18}))
+
+    assert save_outcome_table(4 - 12).equals(Die({'failure': 7, 'success': 13}))
+    assert save_outcome_table(-30).equals(Die({'failure': 20}))
+    assert save_outcome_table(30).equals(Die({'success': 20}))
+
+    # bonuses that are themselves distributions take the general path
+    tree = AttackRollNode(critical_hit_range=[20], critical_miss_range=[1], attack_bonus=RollNode('1d4'), armor_class=10)
+    result = Interpreter().evaluate(tree)
+    assert result.probability('hit') == pytest.approx(50/80)
+
+
+def test_interpreter_binomial_save():
+    assert binomial_die(3, 7, 13).equals(Die({1: 7, 0: 13}) + Die({1: 7, 0: 13}) + Die({1: 7, 0: 13}))
+    assert binomial_die(4, 20, 0).equals(Die({4: 20**4}))
+    assert binomial_die(4, 0, 20).equals(Die({0: 20**4}))
+
+    # four targets, each failing a DC 12 save with a +2 bonus 9 times in 20
+    tree = SaveNode(
+        targeting=TargetingNode(range='60 feet', area={'shape': 'sphere', 'radius': '20 feet'}, max_targets=5, min_targets=0),
+        save_roll=SaveRollNode(save_dc=12, save_bonus=ReferenceNode('target.dexterity_save_bonus')),
+        results={'failure': DamageNode('2d6', 'fire'), 'success': 0.5},
+    )
+    targets = {**TARGETS, 'ranged_target': {'dexterity_save_bonus': 2}}
+    result = Interpreter(targets=targets).evaluate(tree)
+    failures = sum([Die({1: 9, 0: 11})]*4)
+    expected = map(lambda k, x: k*x + (4 - k)*math.floor(0.5*x), failures, d(6) + d(6))
+    assert result.equals(expected)
+
+
+def test_interpreter_sweep():
+    attack = AttackNode(
+        targeting=TargetingNode(range='5 feet', area=None, max_targets=1, min_targets=0),
+        attack_roll=AttackRollNode(
+            critical_hit_range=[20],
+            critical_miss_range=[1],
+            attack_bonus=4,
+            armor_class=ReferenceNode('target.armor_class'),
+        ),
+        results={'critical miss': 0, 'miss': 0, 'hit': DamageNode('1d6', 'slashing'), 'critical hit': DamageNode('2d6', 'slashing')},
+    )
+    save = SaveNode(
+        targeting=TargetingNode(range='5 feet', area=None, max_targets=1, min_targets=0),
+        save_roll=SaveRollNode(save_dc=12, save_bonus=ReferenceNode('target.dexterity_save_bonus')),
+        results={'failure': DamageNode('2d6', 'fire'), 'success': 0.5},
+    )
+    tree = AndNode([attack, save])
+    grid = {'target.armor_class': [10, 15, 20], 'target.dexterity_save_bonus': [-1, 4]}
+
+    interpreter = Interpreter(targets=TARGETS)
+    results = interpreter.sweep(tree, grid)
+    assert [point for point, _ in results] == [
+        {'target.armor_class': ac, 'target.dexterity_save_bonus': sb} for ac in [10, 15, 20] for sb in [-1, 4]
+    ]
+    for point, result in results:
+        targets = {**TARGETS, 'melee_target': {
+            **TARGETS['melee_target'],
+            'armor_class': point['target.armor_class'],
+            'dexterity_save_bonus': point['target.dexterity_save_bonus'],
+        }}
+        assert result.equals(Interpreter(targets=targets).evaluate(tree))
+
+    # the sweep leaves the interpreter and its targets untouched
+    assert interpreter.targets is TARGETS
+    assert interpreter.memo is None
+    assert TARGETS['melee_target']['armor_class'] == 18
+
+    results = Interpreter().sweep(attack.attack_roll, {'target.armor_class': [10, 20]}, target={'armor_class': 15})
+    assert results[0][1].equals(Interpreter().evaluate(attack.attack_roll, target={'armor_class': 10}))
+    assert results[1][1].equals(Interpreter().evaluate(attack.attack_roll, target={'armor_class': 20}))
+
+    # paths in the targets dict, as accepted by update_targets
+    results = interpreter.sweep(attack, {'melee_target.armor_class': [5, 30], 'melee_maxtargets': [1]})
+    for (point, result), ac in zip(results, [5, 30]):
+        targets = set_reference(TARGETS, 'melee_target.armor_class', ac)
+        assert result.equals(Interpreter(targets=targets).evaluate(attack))
+    assert results[0][1].mean() > results[1][1].mean()
+
+    # paths that cannot be applied, or that the tree never reads, are rejected
+    for path in ['target.armour_class', 'ranged_target.armor_class', 'ranged_maxtargets', 'maxtargets', 'caster.level']:
+        with pytest.raises(ValueError):
+            Interpreter(targets=TARGETS).sweep(attack, {path: [1, 2]})
+
+
+def test_freeze():
+    assert freeze({1, 2}) == freeze(frozenset([2, 1])) == ('set', frozenset([('int', 1), ('int', 2)]))
+    assert freeze({'a': {1, 2}}) != freeze({'a': {1, 3}})
+    assert freeze([1, 2]) != freeze({1, 2})
+    hash(freeze({'a': [{1, 2}]}))
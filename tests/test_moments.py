@@ -0,0 +1,47 @@
+import pytest
+from dndast.nodes import *
+from dndast.interpreter import Interpreter
+from dndast.moments import MomentInterpreter
+from . import helpers
+from .helpers import TARGETS
+
+def attack(damage, max_targets=2):
+    return dict_to_node(helpers.attack(damage, f'2*({damage})', attack_bonus=6, critical_hit_range=(19, 20), max_targets=max_targets))
+
+def save(damage, success):
+    return SaveNode(
+        targeting=TargetingNode(range='60 feet', area={'shape': 'sphere', 'radius': '20 feet'}, max_targets=4, min_targets=0),
+        save_roll=SaveRollNode(save_dc=14, save_bonus=ReferenceNode('target.dexterity_save_bonus')),
+        results={'failure': damage, 'success': success},
+    )
+
+def assert_moments(tree, **kwargs):
+    exact = Interpreter(TARGETS).evaluate(tree, **kwargs)
+    moments = MomentInterpreter(TARGETS).evaluate(tree, **kwargs)
+    assert moments.mean() == pytest.approx(float(exact.mean()))
+    assert moments.variance() == pytest.approx(float(exact.variance()))
+
+
+def test_moments_attack():
+    assert_moments(attack('1d8 + 4'))
+    assert_moments(AndNode([attack('2d6 + 3'), attack('1d4', max_targets=1), DamageNode('1d6', 'fire')]))
+
+
+def test_moments_save():
+    # exact whenever the success damage does not need rounding
+    assert_moments(save(DamageNode('8d6', 'fire'), 0))
+    assert_moments(save(DamageNode('8d6', 'fire'), 1))
+    assert_moments(save(7, 0.5))
+
+    # rolled damage halved on a success is approximated without the floor
+    exact = Interpreter(TARGETS).evaluate(save(DamageNode('3d6', 'fire'), 0.5))
+    moments = MomentInterpreter(TARGETS).evaluate(save(DamageNode('3d6', 'fire'), 0.5))
+    assert 0 <= moments.mean() - float(exact.mean()) < 1
+
+
+def test_moments_selection():
+    tree = SelectionNode(
+        selector=SaveRollNode(save_dc=14, save_bonus=ReferenceNode('target.dexterity_save_bonus')),
+        results={'failure': DamageNode('2d10', 'cold'), 'success': RollNode({0: 1, 5: 3})},
+    )
+    assert_moments(tree, target={'dexterity_save_bonus': 2})
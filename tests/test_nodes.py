@@ -1,4 +1,5 @@
 import pytest
+from dataclasses import FrozenInstanceError
 from icepool import d, Die
 from dndast.nodes import *
 
@@ -177,6 +178,53 @@ def test_node_from_dict():
     assert type(tree) is TargetingNode
 
 
+def test_node_from_dict_leaves_input_unchanged():
+    source = {
+        'node': 'And',
+        'values': [
+            {'node': 'Damage', 'value': '1d6', 'type': 'slashing'},
+            {'node': 'Selection', 'selector': {'node': 'SaveRoll', 'save_dc': 13, 'save_bonus': 4}, 'results': {'failure': {'node': 'Damage', 'value': '2d6', 'type': 'fire'}, 'success': {}}},
+        ],
+    }
+    before = repr(source)
+    tree = dict_to_node(source)
+    assert repr(source) == before
+    assert tree.to_dict() == dict_to_node(source).to_dict()
+    assert type(tree.values[1].results['success']) is EmptyNode
+    assert tree.values is not source['values']
+
+    assert dict_to_node({}) == EmptyNode()
+    assert dict_to_node(None) == EmptyNode()
+    with pytest.raises(ValueError, match='Foo'):
+        dict_to_node({'node': 'Foo'})
+
+
+def test_node_slots():
+    for name, node_class in NODE_CLASSES.items():
+        assert '__dict__' not in dir(node_class), name
+
+    # nodes are immutable, so that shared subtrees cannot be changed through one of their trees
+    node = DamageNode('1d6', 'fire')
+    with pytest.raises(FrozenInstanceError):
+        node.value = '2d6'
+    assert node == DamageNode('1d6', 'fire')
+    with pytest.raises(TypeError):
+        hash(node)
+    with pytest.raises(TypeError):
+        hash(AndNode([node]))
+
+    source = {
+        'node': 'AttackRoll',
+        'critical_hit_range': [20],
+        'critical_miss_range': [1],
+        'attack_bonus': 4,
+        'armor_class': {'node': 'Reference', 'value': 'target.armor_class'},
+    }
+    tree = dict_to_node(source)
+    assert tree.to_dict() == source
+    assert list(tree.to_dict()) == list(source)
+    assert dict_to_node({'node': 'SaveRoll', 'save_dc': 13, 'save_bonus': 4}).to_dict() == {'node': 'SaveRoll', 'save_dc': 13, 'save_bonus': 4}
+
 
 def test_node_attackroll():
     tree = AttackRollNode(**{
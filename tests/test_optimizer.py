@@ -0,0 +1,76 @@
+import pytest
+from dndast.nodes import *
+from dndast.interpreter import Interpreter
+from dndast.optimizer import Optimizer
+from .helpers import TARGETS, attack
+
+
+def test_optimizer_and():
+    optimizer = Optimizer()
+    tree = AndNode([
+        DamageNode('1d8', 'slashing'),
+        AndNode([DamageNode('2d8', 'radiant'), AndNode([DamageNode('3', 'slashing'), ValueNode(0)])]),
+        ValueNode(2), ValueNode(0), DamageNode('1d8', 'radiant'),
+    ])
+    assert optimizer.optimize(tree) == AndNode([DamageNode('(1d8) + (3)', 'slashing'), DamageNode('(2d8) + (1d8)', 'radiant'), ValueNode(2)])
+    # the input is left unchanged
+    assert len(tree.values) == 5
+
+    assert optimizer.optimize(AndNode([AndNode([DamageNode('1d6', 'fire')]), ValueNode(0)])) == DamageNode('1d6', 'fire')
+    assert optimizer.optimize(AndNode([AndNode([ValueNode(1), ValueNode(2)])])) == ValueNode(3)
+    assert optimizer.optimize(AndNode([ValueNode(2.0), ValueNode(-2.0)])) == ValueNode(0.0)
+    assert optimizer.optimize(AndNode([])) == ValueNode(0)
+    assert optimizer.optimize(AndNode([DamageNode({1: 1, 2: 1}, 'fire'), DamageNode('1d6', 'fire')])) == AndNode([DamageNode('1d6', 'fire'), DamageNode({1: 1, 2: 1}, 'fire')])
+
+    # sums with terms that are not whole numbers are only optimized inside
+    assert optimizer.optimize(AndNode([EmptyNode(), AndNode([ValueNode(1), ValueNode(2)])])) == AndNode([EmptyNode(), ValueNode(3)])
+    for tree in [AndNode([ValueNode('2d6')]), AndNode([DamageNode('1d6 / 3', 'fire'), DamageNode('1d6', 'fire')]), AndNode([ValueNode(0.1), ValueNode(0.2)])]:
+        assert optimizer.optimize(tree) == tree
+
+
+def test_optimizer_same_results():
+    """The optimized tree evaluates to the same result, or raises the same error, as the input.
+    """
+    def evaluate(tree):
+        try:
+            return Interpreter(TARGETS).evaluate(tree)
+        except Exception as e:
+            return type(e)
+
+    trees = [
+        AndNode([EmptyNode(), DamageNode('1d6', 'fire')]),
+        AndNode([ValueNode('2d6')]),
+        AndNode([ValueNode(0.1), ValueNode(0.2), DamageNode('1d4', 'fire')]),
+        AndNode([DamageNode('1d6 +', 'fire'), DamageNode('2', 'fire')]),
+        AndNode([DamageNode('1d6', 'fire'), ValueNode(0.0)]),
+        AndNode([AndNode([DamageNode('1d6 / 2', 'fire'), DamageNode('1d6 / 2', 'fire')]), ValueNode(0)]),
+        AndNode([dict_to_node(attack('1d6', '2d6')), ValueNode(0)]),
+        AndNode([dict_to_node(attack(ValueNode('hit'), ValueNode('critical hit')))]),
+        AndNode([AndNode([DamageNode('1d8 + 4', 'slashing')]), DamageNode('1d8', 'slashing'), ValueNode(3), ValueNode(-3)]),
+    ]
+    for tree in trees:
+        before, after = evaluate(tree), evaluate(Optimizer().optimize(tree))
+        if type(before) is type:
+            assert after is before, tree
+        elif hasattr(before, 'equals'):
+            assert after.equals(before) and type(after.outcomes()[0]) is type(before.outcomes()[0]), tree
+        else:
+            assert after == before and type(after) is type(before), tree
+
+
+def test_optimizer_equivalent():
+    hit = {'node': 'And', 'values': [
+        {'node': 'Damage', 'value': '1d6 + 2', 'type': 'slashing'},
+        {'node': 'And', 'values': [{'node': 'Damage', 'value': '1d6', 'type': 'slashing'}, {'node': 'Value', 'value': 0}]},
+        {'node': 'Damage', 'value': '2d4', 'type': 'fire'},
+    ]}
+    critical_hit = {'node': 'And', 'values': [{'node': 'Damage', 'value': '4d6 + 2', 'type': 'slashing'}]}
+    bite = attack(hit, critical_hit, attack_bonus={'node': 'Value', 'value': 4})
+    tree = dict_to_node({'node': 'And', 'values': [bite, bite]})
+    optimized = Optimizer().optimize(tree)
+
+    assert optimized.values[0].attack_roll.attack_bonus == ValueNode(4)
+    assert optimized.values[0].results['hit'] == AndNode([DamageNode('(1d6 + 2) + (1d6)', 'slashing'), DamageNode('2d4', 'fire')])
+    assert optimized.values[0].results['critical hit'] == DamageNode('4d6 + 2', 'slashing')
+    assert Interpreter(TARGETS).evaluate(optimized).equals(Interpreter(TARGETS).evaluate(tree))
+    assert dict_to_node(optimized.to_dict()) == optimized
@@ -0,0 +1,66 @@
+import json
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from icepool import d
+from dndast.pipeline import PERCENTILES, WORKER_CACHES, evaluate_stream, main, summarize
+from .helpers import TARGETS, attack
+
+ATTACK = attack('1d8 + 3', '2d8 + 3', attack_bonus=5)
+
+LINES = [
+    json.dumps({'node': 'Damage', 'value': '3d6', 'type': 'fire'}),
+    '',
+    json.dumps({'id': 'bite', 'tree': ATTACK}),
+    '{not json',
+    json.dumps({'node': 'Value', 'value': 4}),
+    json.dumps({'id': 'broken', 'tree': {'node': 'Unknown'}}),
+]
+
+
+def test_summarize():
+    summary = summarize(3@d(6), percentiles=[50, 99.9])
+    assert summary['mean'] == 10.5
+    assert summary['min'] == 3 and summary['max'] == 18
+    assert summary['outcomes'] == 16
+    assert summary['percentiles'] == {'50': 10, '99.9': 18}
+    assert summarize(4)['percentiles']['95'] == 4
+    assert summarize(True) == {'mean': 1.0, 'sd': 0.0, 'min': True, 'max': True, 'outcomes': 1, 'percentiles': {str(p): True for p in PERCENTILES}}
+    assert json.loads(json.dumps(summarize(False)))['mean'] == 0.0
+
+
+def test_evaluate_stream():
+    results = list(evaluate_stream(LINES, TARGETS))
+    assert [r['line'] for r in results] == [1, 3, 4, 5, 6]
+    assert results[0]['mean'] == 10.5
+    assert results[1]['id'] == 'bite'
+    assert results[1]['outcomes'] == 17
+    assert 'error' in results[2]
+    assert results[3]['mean'] == 4
+    assert results[4]['id'] == 'broken' and 'error' in results[4]
+
+    with ThreadPoolExecutor(2) as executor:
+        chunked = list(evaluate_stream(iter(LINES*5), TARGETS, executor=executor, chunk_size=2, max_pending=2))
+    assert chunked == list(evaluate_stream(LINES*5, TARGETS))
+
+
+def test_pipeline_cli(tmp_path):
+    (tmp_path / 'trees.jsonl').write_text('\n'.join(LINES) + '\n')
+    (tmp_path / 'targets.json').write_text(json.dumps(TARGETS))
+    main([str(tmp_path / 'trees.jsonl'), '--targets', str(tmp_path / 'targets.json'), '--output', str(tmp_path / 'stats.jsonl'), '--percentiles', '50'])
+    results = [json.loads(line) for line in (tmp_path / 'stats.jsonl').read_text().splitlines()]
+    assert len(results) == 5
+    assert results[0]['percentiles'] == {'50': 10}
+
+
+def test_evaluate_stream_cache(tmp_path):
+    path = str(tmp_path / 'results.db')
+    first = list(evaluate_stream(LINES, TARGETS, cache=path))
+    assert list(evaluate_stream(LINES, TARGETS, cache=path)) == first
+    with ThreadPoolExecutor(2) as executor:
+        assert list(evaluate_stream(LINES, TARGETS, executor=executor, chunk_size=2, cache=path)) == first
+
+    # a worker opens the cache once for all of its chunks
+    with ThreadPoolExecutor(1) as executor:
+        assert list(evaluate_stream(LINES*3, TARGETS, executor=executor, chunk_size=2, cache=path)) == list(evaluate_stream(LINES*3, TARGETS))
+        caches = executor.submit(lambda: list(WORKER_CACHES.caches.values())).result()
+    assert len(caches) == 1 and caches[0].hits == 9
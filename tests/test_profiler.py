@@ -0,0 +1,61 @@
+import pytest
+from dndast.nodes import *
+from dndast.interpreter import Interpreter
+from dndast.profiler import Profiler, outcome_count
+from .helpers import TARGETS
+
+def save_tree(damage):
+    return AndNode([
+        DamageNode('1d8 + 4', 'slashing'),
+        SaveNode(
+            targeting=TargetingNode(range='60 feet', area={'shape': 'sphere', 'radius': '20 feet'}, max_targets=4, min_targets=0),
+            save_roll=SaveRollNode(save_dc=14, save_bonus=ReferenceNode('target.dexterity_save_bonus')),
+            results={'failure': DamageNode(damage, 'fire'), 'success': 0.5},
+        ),
+    ])
+
+
+def test_profiler():
+    profiler = Profiler()
+    interpreter = Interpreter(TARGETS, profiler=profiler)
+    results = [interpreter.evaluate(save_tree(damage)) for damage in ['2d6', '8d6']]
+    assert results[1].equals(Interpreter(TARGETS).evaluate(save_tree('8d6')))
+
+    # aggregated over both trees
+    stats = profiler.stats('type')
+    assert stats['AndNode'].calls == 2
+    assert stats['SaveNode'].calls == 2
+    assert stats['SaveRollNode'].calls == 2
+    assert stats['ReferenceNode'].calls == 2
+    assert stats['DamageNode'].calls == 4
+    assert stats['AndNode'].max_outcomes == len(results[1].outcomes())
+    assert stats['TargetingNode'].outcomes == 0
+    assert stats['AndNode'].total >= stats['SaveNode'].total
+    assert sum(s.own for s in stats.values()) == pytest.approx(stats['AndNode'].total)
+
+    paths = profiler.stats('path')
+    assert paths['AndNode/SaveNode/SaveRollNode/ReferenceNode'].calls == 2
+    assert paths['AndNode/DamageNode'].calls == 2
+    assert paths['AndNode/SaveNode/DamageNode'].calls == 2
+    assert profiler.stack == []
+
+    report = profiler.report(by='path', limit=3)
+    assert len(report.splitlines()) == 4
+    assert 'SaveNode' in profiler.report()
+    with pytest.raises(ValueError):
+        profiler.report(by='node')
+
+    merged = Profiler().merge(profiler).merge(profiler)
+    assert merged.stats('type')['SaveNode'].calls == 4
+
+
+def test_profiler_errors():
+    profiler = Profiler()
+    tree = AndNode([DamageNode('1d6', 'fire'), DamageNode('1d6 / 0', 'fire')])
+    with pytest.raises(Exception):
+        Interpreter(profiler=profiler).evaluate(tree)
+    assert profiler.stack == []
+    assert profiler.stats('type')['AndNode'].calls == 1
+
+    assert outcome_count(3) == 1
+    assert outcome_count([{}, {}]) is None